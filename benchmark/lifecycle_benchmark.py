@@ -0,0 +1,165 @@
+"""
+JsonDataSource 生命周期性能测试
+使用合成的推送配置，分别测量冷启动加载、无变化重载、单个主播修改重载、批量修改重载、逐个主播 is_need_connect 扫描的耗时，
+以及逐个调用 add() 加载全部主播的耗时（平均每次 add() 的耗时应与主播数量无关），
+并统计各阶段经由 executor 发出的事件数量，结果以 JSON 格式输出，便于在不同版本之间对比
+
+用法: python benchmark/lifecycle_benchmark.py [-o 输出文件] [主播数量 ...]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import Counter
+from importlib import metadata
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starbot_executor import executor  # noqa: E402
+
+from starbot_datasource import config, DataSource, JsonDataSource  # noqa: E402
+from starbot_datasource.core.loader import validate_ups  # noqa: E402
+from starbot_datasource.core.model import Up  # noqa: E402
+from synthetic import generate_ups, write  # noqa: E402
+
+
+class DispatchCounter:
+    """
+    替换 executor.dispatch 的计数桩，仅统计发出的事件数量，不调用任何事件处理器
+    """
+
+    def __init__(self):
+        self.counter: Counter = Counter()
+
+    def __call__(self, data: Any, *subjects: Any, **kwargs) -> None:
+        self.counter[subjects[-1].value] += 1
+
+    def take(self) -> Dict[str, int]:
+        """
+        取出并清空计数
+
+        Returns:
+            事件类型与发出数量的字典
+        """
+        counts = dict(self.counter)
+        self.counter.clear()
+        return counts
+
+
+class AddLoopDataSource(DataSource):
+    """
+    按 README 中自定义数据源的写法，在 load() 中逐个调用 add() 添加主播的数据源
+    """
+
+    def __init__(self, ups: List[Up]):
+        super().__init__()
+        self.__ups = ups
+
+    async def load(self) -> None:
+        for up in self.__ups:
+            self.add(up)
+
+
+async def run(count: int, directory: str, dispatch: DispatchCounter) -> List[Dict[str, Any]]:
+    """
+    对指定数量的主播依次执行各项测试
+
+    Args:
+        count: 主播数量
+        directory: 存放推送配置的临时目录
+        dispatch: 事件计数桩
+
+    Returns:
+        各项测试结果
+    """
+    path = os.path.join(directory, f"{count}.json")
+    config.load({"datasource": {"json_datasource": {"file_path": path, "auto_reload": False}}})
+    results = []
+
+    def record(scenario: str, seconds: float, **extra) -> None:
+        results.append({"ups": count, "scenario": scenario, "seconds": seconds, "dispatched": dispatch.take(), **extra})
+
+    ups = generate_ups(count)
+    write(path, ups)
+    size = os.path.getsize(path)
+
+    datasource = JsonDataSource()
+    start = time.perf_counter()
+    await datasource.load()
+    record("cold_load", time.perf_counter() - start, bytes=size)
+
+    write(path, ups)
+    start = time.perf_counter()
+    await datasource.reload()
+    record("noop_reload", time.perf_counter() - start)
+
+    ups[count // 2]["targets"][0]["live_on"]["message"] += " (已修改)"
+    write(path, ups)
+    start = time.perf_counter()
+    await datasource.reload()
+    record("single_edit_reload", time.perf_counter() - start)
+
+    write(path, generate_ups(count, edited=0.5))
+    start = time.perf_counter()
+    await datasource.reload()
+    record("mass_edit_reload", time.perf_counter() - start, edited=0.5)
+
+    snapshot = datasource.snapshot
+    repeat = max(1, 100000 // count)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        connected = sum(1 for up in snapshot if up.is_need_connect())
+    record("is_need_connect_scan", (time.perf_counter() - start) / repeat, need_connect=connected)
+
+    datasource = AddLoopDataSource(validate_ups(ups))
+    start = time.perf_counter()
+    await datasource.load()
+    assert len(datasource.snapshot) == count
+    seconds = time.perf_counter() - start
+    record("single_add_load", seconds, per_add_us=seconds / count * 1e6)
+
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="JsonDataSource 生命周期性能测试")
+    parser.add_argument("counts", nargs="*", type=int, default=[100, 1000, 10000, 100000], help="主播数量")
+    parser.add_argument("-o", "--output", default="lifecycle_benchmark.json", help="结果输出文件")
+    args = parser.parse_args()
+
+    dispatch = DispatchCounter()
+    executor.dispatch = dispatch
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.counts:
+            for result in await run(count, directory, dispatch):
+                results.append(result)
+                print(f"{result['ups']:>7} UPs  {result['scenario']:<22} {result['seconds'] * 1000:10.2f} ms  "
+                      f"dispatched: {sum(result['dispatched'].values())}")
+
+    try:
+        version = metadata.version("starbot-bilibili-datasource")
+    except metadata.PackageNotFoundError:
+        version = None
+
+    report = {
+        "version": version,
+        "python": platform.python_version(),
+        "pydantic": metadata.version("pydantic"),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,35 @@
+"""
+JSON 配置解析校验性能对比
+逐条构造 Up(**up) 与使用 TypeAdapter 一次性校验字节串两种方式
+
+用法: python benchmark/load_benchmark.py [主播数量 ...]
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starbot_datasource.core.loader import parse_ups  # noqa: E402
+from starbot_datasource.core.model import Up  # noqa: E402
+from synthetic import generate  # noqa: E402
+
+
+def legacy_parse(data: bytes):
+    return [Up(**up) for up in json.loads(data.decode("utf-8"))]
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+    for count in counts:
+        data = generate(count)
+        number = max(1, 10000 // count)
+        legacy = min(timeit.repeat(lambda: legacy_parse(data), number=number, repeat=3)) / number
+        adapter = min(timeit.repeat(lambda: parse_ups(data), number=number, repeat=3)) / number
+        print(f"{count:>7} UPs  Up(**up): {legacy * 1000:9.2f} ms  "
+              f"TypeAdapter.validate_json: {adapter * 1000:9.2f} ms  speedup: {legacy / adapter:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+推送配置内存占用测试
+分别统计关闭与开启推送目标子配置共享时，解析指定规模的推送配置后主播实例树占用的内存与子配置实例数量
+
+用法: python benchmark/memory_benchmark.py [主播数量] [每个主播的推送目标数量]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starbot_datasource.core import model  # noqa: E402
+from starbot_datasource.core.loader import parse_ups  # noqa: E402
+from synthetic import generate  # noqa: E402
+
+
+def measure(data: bytes):
+    """
+    解析推送配置并统计主播实例树占用的内存
+
+    Args:
+        data: 推送配置 JSON 字节串
+
+    Returns:
+        (占用内存字节数, 不同的推送平台与子配置实例数量)
+    """
+    model._intern_pool.clear()
+    gc.collect()
+    tracemalloc.start()
+    ups = parse_ups(data)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sub_configs = set()
+    for up in ups:
+        for target in up.targets:
+            sub_configs.update(map(id, (target.platform, target.live_on, target.live_off,
+                                        target.live_report, target.dynamic_update)))
+    return current, len(sub_configs)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    targets = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    data = generate(count, targets)
+
+    with mock.patch.object(model, "intern_model", lambda instance: instance):
+        before, before_configs = measure(data)
+    after, after_configs = measure(data)
+
+    mib = 1024 * 1024
+    print(f"{count} UPs x {targets} targets")
+    print(f"  without interning: {before / mib:8.1f} MiB, {before_configs} platform / sub-config objects")
+    print(f"  with interning:    {after / mib:8.1f} MiB, {after_configs} platform / sub-config objects")
+    print(f"  saved:             {(before - after) / mib:8.1f} MiB ({(before - after) / before:.1%}), "
+          f"{before_configs - after_configs} objects")
+
+
+if __name__ == "__main__":
+    main()
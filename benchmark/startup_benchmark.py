@@ -0,0 +1,57 @@
+"""
+冷启动加载性能对比
+解析校验 JSON 文件与读取快照缓存两种方式
+
+用法: python benchmark/startup_benchmark.py [主播数量 ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starbot_datasource.core.cache import read_snapshot_cache, write_snapshot_cache  # noqa: E402
+from starbot_datasource.core.loader import load_json_file  # noqa: E402
+from synthetic import generate  # noqa: E402
+
+
+def measure(func, repeat: int = 3) -> float:
+    """
+    多次执行并取最短耗时
+
+    Args:
+        func: 要执行的函数
+        repeat: 执行次数。默认：3
+
+    Returns:
+        最短耗时（秒）
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            path = os.path.join(directory, f"{count}.json")
+            with open(path, "wb") as file:
+                file.write(generate(count))
+
+            digest, ups = load_json_file(path)
+            write_snapshot_cache(path, digest, ups)
+            assert read_snapshot_cache(path)[1] is not None
+
+            cold = measure(lambda: load_json_file(path))
+            cached = measure(lambda: read_snapshot_cache(path))
+            print(f"{count:>7} UPs  JSON: {cold * 1000:9.2f} ms  "
+                  f"snapshot cache: {cached * 1000:9.2f} ms  speedup: {cold / cached:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+性能测试共用的合成推送配置生成器
+各项性能测试均使用此处生成的配置，保证生成的配置始终能通过数据源的完整校验
+"""
+import json
+import random
+from typing import Any, Dict, List, Optional
+
+PLATFORMS = [
+    {"name": "QQ/StarBot", "account": 10000},
+    {"name": "QQ/StarBot", "account": 10001},
+    {"name": "QQ/StarBot", "account": 10002},
+    {"name": "Telegram", "account": "starbot"}
+]
+
+LIVE_ON_MESSAGES = ["{uname} 正在直播 {title}\n{url}{next}{cover}", "{atall}{uname} 开播啦 {url}", "{uname} 开播了"]
+DYNAMIC_UPDATE_MESSAGES = ["{uname} {action}\n{url}{next}{picture}", "{uname} 发布了新动态 {url}"]
+
+
+def generate_ups(count: int,
+                 targets: Optional[int] = None,
+                 seed: int = 0,
+                 edited: float = 0.0) -> List[Dict[str, Any]]:
+    """
+    生成指定数量主播的推送配置，同一主播的推送目标标识符互不相同，各推送功能按不同比例启用
+
+    Args:
+        count: 主播数量
+        targets: 每个主播的推送目标数量，为 None 时随机生成 1 至 5 个。默认：None
+        seed: 随机数种子，种子相同时生成的配置相同。默认：0
+        edited: 修改开播推送内容的主播比例。默认：0.0
+
+    Returns:
+        推送配置
+    """
+    rand = random.Random(seed)
+    edit = random.Random(seed + 1)
+    ids = range(100000, 100000 + max(count, targets or 0) + 5)
+    ups = []
+    for uid in range(1, count + 1):
+        suffix = " (已修改)" if edit.random() < edited else ""
+        up_targets = []
+        for target_id in rand.sample(ids, targets if targets is not None else rand.randint(1, 5)):
+            target = {
+                "id": target_id,
+                "platform": rand.choice(PLATFORMS),
+                "live_on": {"enabled": rand.random() < 0.9, "message": rand.choice(LIVE_ON_MESSAGES) + suffix},
+                "live_off": {"enabled": rand.random() < 0.5, "message": "{uname} 直播结束了"},
+                "dynamic_update": {"enabled": rand.random() < 0.7, "message": rand.choice(DYNAMIC_UPDATE_MESSAGES)}
+            }
+            if rand.random() < 0.3:
+                target["live_report"] = {"enabled": True, "time": True, "fans_change": True, "danmu_ranking": 3}
+            up_targets.append(target)
+        ups.append({"uid": uid, "targets": up_targets})
+    return ups
+
+
+def generate(count: int, targets: Optional[int] = None, seed: int = 0, edited: float = 0.0) -> bytes:
+    """
+    生成指定数量主播的推送配置 JSON 文件内容，参数与 generate_ups 相同
+
+    Returns:
+        JSON 文件内容
+    """
+    return json.dumps(generate_ups(count, targets, seed, edited), ensure_ascii=False).encode("utf-8")
+
+
+def write(path: str, ups: List[Dict[str, Any]]) -> None:
+    """
+    将推送配置写入 JSON 文件
+
+    Args:
+        path: 文件路径
+        ups: 推送配置
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(ups, file, ensure_ascii=False)
@@ -1,3 +1,8 @@
 from .core.config import config
 from .core.event import EventType, DataSourceEvent
 from .core.datasource import DataSource, JsonDataSource
+from .core.sqlite_datasource import SqliteDataSource
+from .core.http_datasource import HttpDataSource
+from .core.directory_datasource import JsonDirectoryDataSource
+from .core.metrics import MetricsHook, NullMetrics, InMemoryMetrics, PrometheusMetrics
+from .core.dispatcher import DispatchQueue
@@ -0,0 +1,184 @@
+import hashlib
+import marshal
+import os
+from importlib import metadata
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from loguru import logger
+
+from ..core import model, template
+from ..core.loader import Digest, get_file_digest
+from ..core.model import Up, PushTarget, Platform, LiveOn, LiveOff, LiveReport, DynamicUpdate, intern_model
+
+CACHE_FORMAT = 2
+"""快照缓存格式版本，缓存文件结构发生变化时递增"""
+
+CACHE_SUFFIX = ".cache"
+"""快照缓存文件扩展名，缓存文件与数据源文件位于同一目录下"""
+
+_CONFIG_FIELDS: Tuple[Tuple[str, Type], ...] = (
+    ("platform", Platform),
+    ("live_on", LiveOn),
+    ("live_off", LiveOff),
+    ("live_report", LiveReport),
+    ("dynamic_update", DynamicUpdate),
+)
+"""推送目标中以共享实例保存的推送平台与各项推送配置"""
+
+_version: Optional[str] = None
+
+
+def get_version() -> str:
+    """
+    获取用于快照缓存键的模型版本，已安装时使用包版本号，以源码方式运行时使用模型源码的摘要
+
+    Returns:
+        模型版本
+    """
+    global _version
+    if _version is None:
+        try:
+            _version = metadata.version("starbot-bilibili-datasource")
+        except metadata.PackageNotFoundError:
+            digest = hashlib.blake2b(digest_size=8)
+            for module in (model, template):
+                with open(module.__file__, "rb") as file:
+                    digest.update(file.read())
+            _version = f"source-{digest.hexdigest()}"
+    return _version
+
+
+def get_cache_path(path: str) -> str:
+    """
+    获取数据源文件对应的快照缓存文件路径
+
+    Args:
+        path: 数据源文件路径
+
+    Returns:
+        快照缓存文件路径
+    """
+    return path + CACHE_SUFFIX
+
+
+def _get_key(digest: Digest) -> Tuple[Any, ...]:
+    return CACHE_FORMAT, get_version(), digest
+
+
+def _dump_ups(ups: List[Up]) -> Tuple[list, list]:
+    """
+    将主播实例转换为仅含基本类型的结构，内容相同的推送平台与推送配置只保存一份，各推送目标以序号引用
+
+    Args:
+        ups: 主播实例列表
+
+    Returns:
+        (推送平台与推送配置列表, 主播列表)
+    """
+    configs = []
+    indexes: Dict[int, int] = {}
+
+    dumped = []
+    for up in ups:
+        targets = []
+        for target in up.targets:
+            fields = target.__dict__
+            dumped_target = [target.id]
+            for kind, (name, _) in enumerate(_CONFIG_FIELDS):
+                config = fields[name]
+                index = indexes.get(id(config))
+                if index is None:
+                    index = indexes[id(config)] = len(configs)
+                    configs.append((kind, config.model_dump()))
+                dumped_target.append(index)
+            targets.append(tuple(dumped_target))
+        dumped.append((up.uid, targets))
+    return configs, dumped
+
+
+def _load_ups(configs: list, dumped: list) -> List[Up]:
+    """
+    从仅含基本类型的结构重建主播实例，缓存内容写入前已经过校验，使用 model_construct() 跳过校验，
+    推送内容模板与主播能力概要会在首次使用时计算
+
+    Args:
+        configs: 推送平台与推送配置列表
+        dumped: 主播列表
+
+    Returns:
+        主播实例列表
+    """
+    shared = [intern_model(_CONFIG_FIELDS[kind][1].model_construct(**fields)) for kind, fields in configs]
+    construct_target = PushTarget.model_construct
+    construct_up = Up.model_construct
+
+    ups = []
+    for uid, targets in dumped:
+        push_targets = [
+            construct_target(
+                id=target_id,
+                platform=shared[platform],
+                live_on=shared[live_on],
+                live_off=shared[live_off],
+                live_report=shared[live_report],
+                dynamic_update=shared[dynamic_update],
+            )
+            for target_id, platform, live_on, live_off, live_report, dynamic_update in targets
+        ]
+        ups.append(construct_up(uid=uid, targets=push_targets))
+    return ups
+
+
+def read_snapshot_cache(path: str) -> Tuple[Digest, Optional[List[Up]]]:
+    """
+    计算数据源文件的内容摘要，若快照缓存与文件内容及模型版本均一致，则直接读取缓存中已校验的主播配置
+    缓存以 marshal 格式保存仅含基本类型的数据，读取时不会执行任何代码
+    缓存不存在、已过期或已损坏时返回 None，由调用方重新解析数据源文件
+
+    Args:
+        path: 数据源文件路径
+
+    Returns:
+        (文件内容摘要, 主播实例列表)，缓存不可用时主播实例列表为 None
+    """
+    digest = get_file_digest(path)
+    try:
+        with open(get_cache_path(path), "rb") as file:
+            if marshal.load(file) != _get_key(digest):
+                return digest, None
+            configs, dumped = marshal.load(file)
+        return digest, _load_ups(configs, dumped)
+    except FileNotFoundError:
+        return digest, None
+    except Exception as ex:
+        logger.warning(f"读取快照缓存异常 {ex}, 将重新解析数据源文件")
+        return digest, None
+
+
+def write_snapshot_cache(path: str, digest: Digest, ups: List[Up]) -> bool:
+    """
+    将已校验的主播配置写入快照缓存，先写入临时文件再替换，以免中途失败时留下不完整的缓存
+
+    Args:
+        path: 数据源文件路径
+        digest: 与主播实例对应的数据源文件内容摘要
+        ups: 主播实例列表
+
+    Returns:
+        是否写入成功
+    """
+    cache_path = get_cache_path(path)
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as file:
+            marshal.dump(_get_key(digest), file)
+            marshal.dump(_dump_ups(ups), file)
+        os.replace(temp_path, cache_path)
+        return True
+    except Exception as ex:
+        logger.warning(f"写入快照缓存异常 {ex}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
@@ -0,0 +1,113 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, NamedTuple, NoReturn, Optional, Tuple
+
+from ..core.event import DataSourceEvent
+from ..core.model import Up, UpChangeSet
+from ..core.snapshot import DataSourceSnapshot
+
+
+class ChangeLogEntry(NamedTuple):
+    """
+    变更日志条目，对应一次逐个主播事件
+    """
+
+    generation: int
+    """变更生效后的快照版本号，同一批变更中的条目版本号相同"""
+
+    event: DataSourceEvent
+    """事件类型，为 DataSourceAdded、DataSourceRemoved 或 DataSourceUpdated"""
+
+    uid: int
+    """主播 UID"""
+
+    changeset: Optional[UpChangeSet]
+    """更新主播的变更集，其余事件类型为 None"""
+
+    up: Up
+    """主播实例，移除事件为移除前的实例，其余事件为新实例"""
+
+
+class ChangeLogReplay(NamedTuple):
+    """
+    从指定版本号开始的变更重放结果
+    """
+
+    generation: int
+    """重放结果对应的快照版本号，下次重放时传入此值"""
+
+    changes: Tuple[ChangeLogEntry, ...]
+    """按发生顺序排列的变更，需要完整同步时为空"""
+
+    snapshot: Optional[DataSourceSnapshot]
+    """指定版本号已超出变更日志的保留范围时为完整快照，此时需丢弃本地状态并以快照完整同步，否则为 None"""
+
+
+class ChangeLog:
+    """
+    有界环形变更日志，保留最近的若干条逐个主播变更，供晚订阅或落后的事件消费者增量同步
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity: 最多保留的条目数量
+        """
+        self.__entries: Deque[ChangeLogEntry] = deque()
+        self.__capacity = max(capacity, 0)
+        self.__floor = 0
+
+    @property
+    def floor(self) -> int:
+        """
+        可增量重放的最小版本号，版本号大于此值的变更均完整保留
+        """
+        return self.__floor
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def record(self,
+               generation: int,
+               event: DataSourceEvent,
+               ups: Iterable[Up],
+               changesets: Optional[Dict[int, UpChangeSet]] = None) -> NoReturn:
+        """
+        记录一批同类型的变更，超出容量时丢弃最早的条目
+
+        Args:
+            generation: 变更生效后的快照版本号
+            event: 事件类型
+            ups: 发生变更的主播实例，移除事件为移除前的实例
+            changesets: 更新主播的变更集字典，键为主播 UID。默认：None
+        """
+        changesets = changesets or {}
+        for up in ups:
+            if len(self.__entries) >= self.__capacity:
+                if not self.__capacity:
+                    self.__floor = generation
+                    return
+                self.__floor = self.__entries.popleft().generation
+
+            self.__entries.append(ChangeLogEntry(generation, event, up.uid, changesets.get(up.uid), up))
+
+    def changes_since(self, generation: int, snapshot: DataSourceSnapshot) -> ChangeLogReplay:
+        """
+        获取指定版本号之后发生的全部变更，指定版本号已超出保留范围时返回完整快照
+
+        Args:
+            generation: 消费者已同步到的快照版本号
+            snapshot: 数据源当前快照
+
+        Returns:
+            变更重放结果
+        """
+        if generation < self.__floor or generation > snapshot.generation:
+            return ChangeLogReplay(snapshot.generation, (), snapshot)
+
+        changes = []
+        for entry in reversed(self.__entries):
+            if entry.generation <= generation:
+                break
+            changes.append(entry)
+        changes.reverse()
+        return ChangeLogReplay(snapshot.generation, tuple(changes), None)
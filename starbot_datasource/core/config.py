@@ -1,57 +1,134 @@
 import json
+import threading
 from json import JSONDecodeError
-from typing import Dict, Any, Type, Optional
+from typing import Dict, Any, Type, Optional, Tuple, Generic, TypeVar, NoReturn
 
 from loguru import logger
 
 from ..exception.DataSourceException import DataSourceException
 
+T = TypeVar("T")
+
+_MISSING = object()
+_UNRESOLVED = object()
+
+
+class ConfigOption(Generic[T]):
+    """
+    预先绑定的配置项，首次读取时解析并缓存配置项的值，之后的读取只需一次版本号比较
+    配置重新加载后会自动重新解析，请通过 Config.option() 创建
+    """
+
+    __slots__ = ("__config", "__attribute", "__type", "__default", "__optional", "__value", "__version")
+
+    def __init__(self,
+                 config: "Config",
+                 attribute: str,
+                 _type: Type[T],
+                 default: Optional[T] = None,
+                 optional: bool = False):
+        self.__config = config
+        self.__attribute = attribute
+        self.__type = _type
+        self.__default = default
+        self.__optional = optional
+        self.__value: Optional[T] = default
+        self.__version = -1
+
+    @property
+    def attribute(self) -> str:
+        """
+        配置项
+        """
+        return self.__attribute
+
+    def __call__(self) -> Optional[T]:
+        """
+        获取配置项的值
+
+        Returns:
+            配置项的值，若配置项不存在或类型转换失败，返回默认值
+        """
+        if self.__version != self.__config.version:
+            self.__value = self.__config.get(self.__attribute, self.__type, self.__default, self.__optional)
+            self.__version = self.__config.version
+        return self.__value
+
 
 class Config:
     """
     全局配置类
+    配置文件 config.json 会在首次读取配置项时加载，配置项的解析结果会被缓存，每个配置项的警告只会输出一次
     """
 
-    __config: Dict[str, Any]
+    __config: Optional[Dict[str, Any]]
 
-    def __init__(self):
-        try:
-            with open("config.json", encoding="utf-8") as file:
-                self.__config = json.loads(file.read())
-        except Exception as ex:
-            if isinstance(ex, FileNotFoundError):
-                logger.error("配置文件 config.json 不存在")
-            elif isinstance(ex, UnicodeDecodeError):
-                logger.error("配置文件 config.json 编码不正确, 请将其转换为 UTF-8 格式编码")
-            elif isinstance(ex, JSONDecodeError):
-                logger.error("配置文件 config.json 内容格式不正确")
-            else:
-                logger.error(f"读取配置文件 config.json 异常 {ex}")
-            raise DataSourceException("读取配置文件 config.json 异常")
-
-    def get(self, attribute: str, _type: Type, default: Optional[Any] = None) -> Optional[Any]:
+    def __init__(self, path: str = "config.json"):
         """
-        获取配置项的值
+        Args:
+            path: 配置文件路径。默认：config.json
+        """
+        self.__path = path
+        self.__config = None
+        self.__cache: Dict[Tuple[str, Type], Any] = {}
+        self.__version = 0
+        self.__lock = threading.RLock()
+
+    @property
+    def version(self) -> int:
+        """
+        配置版本号，每次加载配置后递增 1
+        """
+        return self.__version
+
+    def load(self, conf: Optional[Dict[str, Any]] = None) -> NoReturn:
+        """
+        加载配置，并清空已缓存的配置项解析结果，可用于重新加载配置文件，或在测试中直接传入配置
+
+        Args:
+            conf: 配置字典，为 None 时从配置文件中读取。默认：None
+        """
+        if conf is None:
+            try:
+                with open(self.__path, encoding="utf-8") as file:
+                    conf = json.loads(file.read())
+            except Exception as ex:
+                if isinstance(ex, FileNotFoundError):
+                    logger.error(f"配置文件 {self.__path} 不存在")
+                elif isinstance(ex, UnicodeDecodeError):
+                    logger.error(f"配置文件 {self.__path} 编码不正确, 请将其转换为 UTF-8 格式编码")
+                elif isinstance(ex, JSONDecodeError):
+                    logger.error(f"配置文件 {self.__path} 内容格式不正确")
+                else:
+                    logger.error(f"读取配置文件 {self.__path} 异常 {ex}")
+                raise DataSourceException(f"读取配置文件 {self.__path} 异常")
+
+        with self.__lock:
+            self.__config = conf
+            self.__cache = {}
+            self.__version += 1
+
+    def __resolve(self, attribute: str, _type: Type, default: Optional[Any], optional: bool) -> Any:
+        """
+        解析配置项的值，解析过程中的警告只会在首次解析时输出
 
         Args:
             attribute: 配置项，多个配置项之间可使用.分隔
-            _type: 预期类型，若类型不匹配会产生警告，并尝试进行自动转换
-            default: 默认值，若要获取的配置项不存在或类型转换失败，返回默认值。默认：None
+            _type: 预期类型
+            default: 默认值，仅用于警告信息
+            optional: 是否为可选配置项，可选配置项不存在时不输出警告
 
         Returns:
-            配置项的值，若要获取的配置项不存在或类型转换失败，返回默认值
+            配置项的值，若配置项不存在或类型转换失败，返回 _MISSING
         """
-        keys = attribute.split(".")
         conf = self.__config
 
-        for key in keys:
-            if not isinstance(conf, dict):
-                logger.warning(f"配置项 {attribute} 不存在, 已使用默认值: {default}, 请补全配置文件 config.json")
-                return default
-
-            if key not in conf:
-                logger.warning(f"配置项 {attribute} 不存在, 已使用默认值: {default}, 请补全配置文件 config.json")
-                return default
+        for key in attribute.split("."):
+            if not isinstance(conf, dict) or key not in conf:
+                if optional:
+                    return _MISSING
+                logger.warning(f"配置项 {attribute} 不存在, 已使用默认值: {default}, 请补全配置文件 {self.__path}")
+                return _MISSING
 
             conf = conf[key]
 
@@ -59,7 +136,7 @@ class Config:
             return conf
 
         logger.warning(
-            f"配置项 {attribute} 数据类型不正确, 预期类型: {_type}, 实际类型: {type(conf)}, 请检查配置文件 config.json"
+            f"配置项 {attribute} 数据类型不正确, 预期类型: {_type}, 实际类型: {type(conf)}, 请检查配置文件 {self.__path}"
         )
 
         try:
@@ -67,8 +144,54 @@ class Config:
             logger.success(f"配置项 {attribute} 数据类型自动转换成功")
             return auto_cast_value
         except Exception:
-            logger.warning(f"配置项 {attribute} 数据类型自动转换失败, 已使用默认值: {default}, 请检查配置文件 config.json")
-            return default
+            logger.warning(f"配置项 {attribute} 数据类型自动转换失败, 已使用默认值: {default}, 请检查配置文件 {self.__path}")
+            return _MISSING
+
+    def get(self, attribute: str, _type: Type, default: Optional[Any] = None, optional: bool = False) -> Optional[Any]:
+        """
+        获取配置项的值
+
+        Args:
+            attribute: 配置项，多个配置项之间可使用.分隔
+            _type: 预期类型，若类型不匹配会产生警告，并尝试进行自动转换
+            default: 默认值，若要获取的配置项不存在或类型转换失败，返回默认值。默认：None
+            optional: 是否为可选配置项，可选配置项不存在时直接使用默认值，不输出警告。默认：False
+
+        Returns:
+            配置项的值，若要获取的配置项不存在或类型转换失败，返回默认值
+        """
+        key = (attribute, _type)
+        value = self.__cache.get(key, _UNRESOLVED)
+        if value is _UNRESOLVED:
+            with self.__lock:
+                if self.__config is None:
+                    self.load()
+
+                value = self.__cache.get(key, _UNRESOLVED)
+                if value is _UNRESOLVED:
+                    value = self.__resolve(attribute, _type, default, optional)
+                    self.__cache[key] = value
+
+        return default if value is _MISSING else value
+
+    def option(self,
+               attribute: str,
+               _type: Type[T],
+               default: Optional[T] = None,
+               optional: bool = False) -> ConfigOption[T]:
+        """
+        创建预先绑定的配置项，适用于需要频繁读取配置项的场景，以及新版本加入的可选配置项
+
+        Args:
+            attribute: 配置项，多个配置项之间可使用.分隔
+            _type: 预期类型，若类型不匹配会产生警告，并尝试进行自动转换
+            default: 默认值，若要获取的配置项不存在或类型转换失败，返回默认值。默认：None
+            optional: 是否为可选配置项，可选配置项不存在时直接使用默认值，不输出警告。默认：False
+
+        Returns:
+            预先绑定的配置项，调用即可获取配置项的值
+        """
+        return ConfigOption(self, attribute, _type, default, optional)
 
 
 config: Config = Config()
@@ -1,19 +1,64 @@
 import abc
 import asyncio
-import json
 import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from json import JSONDecodeError
-from typing import Dict, NoReturn, Set
+from typing import AsyncIterator, Dict, NoReturn, Optional, Tuple, List, Iterable, FrozenSet, Union, Mapping
 
 from loguru import logger
-from pydantic import ValidationError
 from starbot_executor import executor
 
 from .. import config
 from ..core.event import EventType, DataSourceEvent
-from ..core.model import Up
+from ..core.cache import read_snapshot_cache, write_snapshot_cache
+from ..core.changelog import ChangeLog, ChangeLogReplay
+from ..core.diff import diff_up
+from ..core.dispatcher import DispatchQueue
+from ..core.loader import Digest, load_json_file, stream_json_file, get_file_digest, iter_ups, load_timed
+from ..core.metrics import MetricsHook, NullMetrics
+from ..core.model import Up, UpChangeSet, DataSourceChangeSet, Platform, FEATURES, CAPABILITIES
+from ..core.scheduler import ReloadScheduler
+from ..core.shard import HashRing
+from ..core.snapshot import DataSourceSnapshot, SnapshotBuilder
+from ..core.validator import check_duplicates, check_up, format_problems
+from ..core.watcher import FileWatcher, create_watcher
 from ..exception.DataSourceException import DataSourceException
 
+_CHANGELOG_CAPACITY = config.option("datasource.changelog_capacity", int, 10000, optional=True)
+"""变更日志最多保留的条目数量"""
+
+_DISPATCH_QUEUE_ENABLED = config.option("datasource.dispatch_queue.enabled", bool, False, optional=True)
+"""是否启用逐个主播事件的限速发出队列"""
+
+_DISPATCH_QUEUE_RATE = config.option("datasource.dispatch_queue.rate", float, 20.0, optional=True)
+"""发出队列每秒最多发出的事件数量"""
+
+_DISPATCH_QUEUE_BURST = config.option("datasource.dispatch_queue.burst", int, 50, optional=True)
+"""发出队列的令牌桶容量"""
+
+_SHARD_COUNT = config.option("datasource.shard.count", int, 1, optional=True)
+"""分片数量，为 1 时不启用分片"""
+
+_SHARD_INDEX = config.option("datasource.shard.index", int, 0, optional=True)
+"""当前实例负责的分片序号"""
+
+_SHARD_VIRTUAL_NODES = config.option("datasource.shard.virtual_nodes", int, 160, optional=True)
+"""一致性哈希环中每个分片的虚拟节点数量"""
+
+_JSON_PARSE_EXECUTOR = config.option("datasource.json_datasource.parse_executor", str, "thread", optional=True)
+"""JSON 数据源解析配置的方式，可选值：thread，process"""
+
+_JSON_STREAMING = config.option("datasource.json_datasource.streaming", bool, False, optional=True)
+"""JSON 数据源是否以流式读取方式初始化配置"""
+
+_JSON_STREAM_BATCH_SIZE = config.option("datasource.json_datasource.stream_batch_size", int, 1000, optional=True)
+"""JSON 数据源流式读取时每批添加的主播数量"""
+
+_JSON_SNAPSHOT_CACHE = config.option("datasource.json_datasource.snapshot_cache", bool, False, optional=True)
+"""JSON 数据源是否启用快照缓存"""
+
 
 class DataSource(metaclass=abc.ABCMeta):
     """
@@ -21,12 +66,303 @@ class DataSource(metaclass=abc.ABCMeta):
     """
 
     def __init__(self):
-        self.ups: Set[Up] = set()
-        self.uids: Set[int] = set()
-        self.__up_map: Dict[int, Up] = {}
+        self.__snapshot = DataSourceSnapshot({})
+        self.__builder: Optional[SnapshotBuilder] = None
+        self.__lock = threading.RLock()
+        self.__ring: Optional[HashRing] = None
+        self.__shard_index = 0
+        self.__loaded: Dict[int, Up] = {}
+        self.__metrics: MetricsHook = NullMetrics()
+
+        self.__per_up_events = config.option("datasource.per_up_events", bool, True, optional=True)
+        self.__changelog = ChangeLog(_CHANGELOG_CAPACITY())
+
+        self.__dispatch_queue: Optional[DispatchQueue] = None
+        if _DISPATCH_QUEUE_ENABLED():
+            self.__dispatch_queue = DispatchQueue(_DISPATCH_QUEUE_RATE(), _DISPATCH_QUEUE_BURST())
+            self.__dispatch_queue.set_metrics(self.name, self.__metrics)
+
+        shard_count = _SHARD_COUNT()
+        if shard_count > 1:
+            self.__set_shard(_SHARD_INDEX(), HashRing(shard_count, _SHARD_VIRTUAL_NODES()))
+            logger.info(f"已启用分片, 当前实例负责第 {self.__shard_index} 个分片 (共 {shard_count} 个分片)")
 
     def __getitem__(self, key):
-        return self.__up_map[key]
+        return self.snapshot[key]
+
+    @property
+    def name(self) -> str:
+        """
+        数据源名称，用作指标的 source 标签，默认为类名
+        """
+        return type(self).__name__
+
+    @property
+    def metrics(self) -> MetricsHook:
+        """
+        数据源指标钩子，未设置时为不记录任何指标的空实现
+        """
+        return self.__metrics
+
+    def set_metrics(self, hook: Optional[MetricsHook]) -> NoReturn:
+        """
+        设置数据源指标钩子，设置后会立即记录一次当前的主播数量与索引大小
+
+        Args:
+            hook: 指标钩子，为 None 时不再记录指标
+        """
+        self.__metrics = hook if hook is not None else NullMetrics()
+        if self.__dispatch_queue is not None:
+            self.__dispatch_queue.set_metrics(self.name, self.__metrics)
+        self.__report_sizes()
+
+    @property
+    def dispatch_queue(self) -> Optional[DispatchQueue]:
+        """
+        逐个主播事件的限速发出队列，未启用时为 None
+        """
+        return self.__dispatch_queue
+
+    def __dispatch(self, event: DataSourceEvent, up: Up, previous: Optional[Up] = None) -> NoReturn:
+        """
+        发出逐个主播事件，启用发出队列时加入队列按优先级与速率限制发出，否则立即发出
+
+        Args:
+            event: 事件类型
+            up: 主播实例，移除事件为移除前的实例
+            previous: 更新事件的旧主播实例。默认：None
+        """
+        if self.__dispatch_queue is not None:
+            self.__dispatch_queue.put(event, up, previous)
+        else:
+            executor.dispatch(up, EventType.DataSourceEvent, event)
+
+    def __report_sizes(self) -> NoReturn:
+        """
+        记录当前的主播数量与各二级索引的键数量
+        """
+        current = self.__current()
+        self.__metrics.sizes(self.name, len(current), current.indexes.sizes())
+
+    def __report_apply(self, start: float, added: int, removed: int, updated: int, events: Dict[str, int]) -> NoReturn:
+        """
+        记录一次变更的应用耗时、变化的主播数量与发出的事件数量
+
+        Args:
+            start: 开始应用变更的时间
+            added: 新增的主播数量
+            removed: 移除的主播数量
+            updated: 更新的主播数量
+            events: 事件类型与发出数量的字典
+        """
+        source = self.name
+        metrics = self.__metrics
+        metrics.stage(source, "apply", time.perf_counter() - start)
+        metrics.ups_changed(source, "added", added)
+        metrics.ups_changed(source, "removed", removed)
+        metrics.ups_changed(source, "updated", updated)
+        for event, count in events.items():
+            metrics.events_dispatched(source, event, count)
+
+    def __set_shard(self, index: int, ring: Optional[HashRing]) -> NoReturn:
+        """
+        设置当前实例负责的分片
+
+        Args:
+            index: 分片序号，从 0 开始
+            ring: 一致性哈希环，为 None 时表示不分片
+        """
+        count = ring.count if ring is not None else 1
+        if not 0 <= index < count:
+            raise DataSourceException(f"分片序号必须在 0 至 {count - 1} 之间, 当前值: {index}")
+        self.__shard_index = index
+        self.__ring = ring
+
+    def changes_since(self, generation: int) -> ChangeLogReplay:
+        """
+        获取指定快照版本号之后发生的全部主播变更，供晚订阅或落后的事件消费者增量同步
+        指定版本号已超出变更日志的保留范围时，返回结果中包含完整快照，消费者需以快照完整同步
+
+        Args:
+            generation: 消费者已同步到的快照版本号，首次同步时可传入 0
+
+        Returns:
+            变更重放结果，消费者下次同步时应传入其中的 generation
+        """
+        return self.__changelog.changes_since(generation, self.snapshot)
+
+    @property
+    def shard_index(self) -> int:
+        """
+        当前实例负责的分片序号，未启用分片时为 0
+        """
+        return self.__shard_index
+
+    @property
+    def shard_count(self) -> int:
+        """
+        分片数量，未启用分片时为 1
+        """
+        return self.__ring.count if self.__ring is not None else 1
+
+    def owns(self, uid: int) -> bool:
+        """
+        判断主播是否属于当前实例负责的分片
+
+        Args:
+            uid: 主播 UID
+
+        Returns:
+            主播是否属于当前分片，未启用分片时始终为 True
+        """
+        return self.__ring is None or self.__ring.shard_of(uid) == self.__shard_index
+
+    @property
+    def loaded_ups(self) -> List[Up]:
+        """
+        数据源中读取到的全部主播实例，包含不属于当前分片的主播，未启用分片时与 ups 相同
+        """
+        return list(self.__loaded_map().values())
+
+    def __loaded_map(self) -> Mapping[int, Up]:
+        """
+        获取全部已读取主播的映射，启用分片时包含不属于当前分片的主播
+
+        Returns:
+            主播 UID 与主播实例的映射
+        """
+        return self.__loaded if self.__ring is not None else self.__current().up_map
+
+    def __current(self) -> Union[DataSourceSnapshot, SnapshotBuilder]:
+        """
+        获取包含全部已应用变更的当前状态，存在尚未发布的变更时为快照工作副本，仅供数据源内部读取
+
+        Returns:
+            快照工作副本或当前快照
+        """
+        builder = self.__builder
+        return builder if builder is not None else self.__snapshot
+
+    def __stage(self) -> SnapshotBuilder:
+        """
+        开始一次变更，获取快照工作副本并递增版本号，调用方需持有锁
+        连续的变更会累积在同一个工作副本中，直至读取快照时才构建并发布新快照，
+        因此逐个添加大量主播时，每次变更的开销与主播总数无关
+
+        Returns:
+            快照工作副本
+        """
+        builder = self.__builder
+        if builder is None:
+            builder = self.__builder = SnapshotBuilder(self.__snapshot)
+        builder.generation += 1
+        return builder
+
+    @property
+    def snapshot(self) -> DataSourceSnapshot:
+        """
+        数据源当前的只读快照，需要多次读取并保证一致性时，应先获取快照再从快照中读取
+        存在尚未发布的变更时，会先以快照工作副本构建并发布新快照
+        """
+        if self.__builder is not None:
+            with self.__lock:
+                builder = self.__builder
+                if builder is not None:
+                    self.__snapshot = builder.build()
+                    self.__builder = None
+        return self.__snapshot
+
+    @property
+    def generation(self) -> int:
+        """
+        数据源当前快照的版本号，数据源每发生一次变化递增 1
+        """
+        return self.__current().generation
+
+    @property
+    def ups(self) -> FrozenSet[Up]:
+        """
+        全部主播实例
+        """
+        return self.snapshot.ups
+
+    @property
+    def uids(self) -> FrozenSet[int]:
+        """
+        全部主播 UID
+        """
+        return self.snapshot.uids
+
+    def get_ups_by_platform(self, platform: Platform) -> List[Up]:
+        """
+        获取推送平台（机器人账号）所服务的全部主播
+
+        Args:
+            platform: 推送平台
+
+        Returns:
+            至少有一个推送目标位于此推送平台的主播
+        """
+        snapshot = self.snapshot
+        return [snapshot[uid] for uid in snapshot.indexes.by_platform.get(platform, ())]
+
+    def get_ups_by_target(self, target_id: Union[int, str], platform: Platform) -> List[Up]:
+        """
+        获取需要推送至指定推送目标的全部主播
+
+        Args:
+            target_id: 推送目标标识符，一般为账号或群号
+            platform: 推送平台
+
+        Returns:
+            推送目标中包含此推送目标的主播
+        """
+        snapshot = self.snapshot
+        return [snapshot[uid] for uid in snapshot.indexes.by_target.get((target_id, platform), ())]
+
+    def get_ups_by_feature(self, feature: str) -> List[Up]:
+        """
+        获取启用了指定推送功能的全部主播
+
+        Args:
+            feature: 推送功能，可选值：live_on，live_off，live_report，dynamic_update
+
+        Returns:
+            至少有一个推送目标启用了此推送功能的主播
+        """
+        if feature not in FEATURES:
+            raise DataSourceException(f"不支持的推送功能: {feature}")
+
+        snapshot = self.snapshot
+        return [snapshot[uid] for uid in snapshot.indexes.by_feature.get(feature, ())]
+
+    def get_ups_by_capability(self, capability: str) -> List[Up]:
+        """
+        获取具有指定能力的全部主播，例如获取全部需要连接直播间的主播
+
+        Args:
+            capability: 主播能力，可选值：need_connect，need_dynamic，need_report
+
+        Returns:
+            具有此能力的主播
+        """
+        if capability not in CAPABILITIES:
+            raise DataSourceException(f"不支持的主播能力: {capability}")
+
+        snapshot = self.snapshot
+        return [snapshot[uid] for uid in snapshot.indexes.by_capability.get(capability, ())]
+
+    @staticmethod
+    def __check(up: Up) -> NoReturn:
+        """
+        检查单个主播的推送目标之间的约束与推送内容模板，与批量变更使用相同的检查
+
+        Args:
+            up: 主播实例
+        """
+        problems = check_up(up)
+        if problems:
+            raise DataSourceException(format_problems(problems))
 
     @abc.abstractmethod
     async def load(self) -> NoReturn:
@@ -35,58 +371,321 @@ class DataSource(metaclass=abc.ABCMeta):
         """
         pass
 
+    async def close(self) -> NoReturn:
+        """
+        停止自动重载等后台任务并释放数据源占用的资源，基类实现会停止事件发出队列
+        """
+        if self.__dispatch_queue is not None:
+            self.__dispatch_queue.close()
+
     def add(self, up: Up) -> NoReturn:
         """
-        动态添加主播
+        动态添加主播，启用分片时不属于当前分片的主播仅会被记录，不会发出事件
+        主播配置未通过检查时抛出校验报告，数据源不会发生任何变化
 
         Args:
             up: 主播实例
         """
-        if up.uid in self.uids:
+        if up.uid in self.__loaded_map():
             raise DataSourceException(f"数据源中不可含有重复的主播 (UID: {up.uid})")
+        self.__check(up)
+        up = up.with_changeset(None)
+
+        if self.__ring is not None:
+            self.__loaded[up.uid] = up
+            if not self.owns(up.uid):
+                return
 
-        self.ups.add(up)
-        self.uids.add(up.uid)
-        self.__up_map[up.uid] = up
+        start = time.perf_counter()
+        with self.__lock:
+            builder = self.__stage()
+            builder.put(up)
+            self.__changelog.record(builder.generation, DataSourceEvent.DataSourceAdded, [up])
+        self.__report_sizes()
 
-        executor.dispatch(up, EventType.DataSourceEvent, DataSourceEvent.DataSourceAdded)
+        self.__dispatch(DataSourceEvent.DataSourceAdded, up)
+        self.__report_apply(start, 1, 0, 0, {DataSourceEvent.DataSourceAdded.value: 1})
 
     def remove(self, uid: int) -> NoReturn:
         """
-        动态移除主播
+        动态移除主播，启用分片时不属于当前分片的主播仅会被移除记录，不会发出事件
 
         Args:
             uid: 主播 UID
         """
-        if uid not in self.uids:
+        if uid not in self.__loaded_map():
             raise DataSourceException(f"主播 (UID: {uid}) 不存在于数据源中")
 
-        up = self.__up_map.get(uid)
-        self.ups.remove(up)
-        self.uids.remove(uid)
-        self.__up_map.pop(uid)
+        if self.__ring is not None:
+            del self.__loaded[uid]
+            if uid not in self.__current():
+                return
+
+        start = time.perf_counter()
+        with self.__lock:
+            builder = self.__stage()
+            up = builder.pop(uid)
+            self.__changelog.record(builder.generation, DataSourceEvent.DataSourceRemoved, [up])
+        self.__report_sizes()
 
-        executor.dispatch(up, EventType.DataSourceEvent, DataSourceEvent.DataSourceRemoved)
+        self.__dispatch(DataSourceEvent.DataSourceRemoved, up)
+        self.__report_apply(start, 0, 1, 0, {DataSourceEvent.DataSourceRemoved.value: 1})
 
-    def update(self, up: Up) -> NoReturn:
+    def update(self, up: Up, changeset: Optional[UpChangeSet] = None) -> NoReturn:
         """
-        动态更新主播
+        动态更新主播，启用分片时不属于当前分片的主播仅会被更新记录，不会发出事件
+        主播配置未通过检查时抛出校验报告，数据源不会发生任何变化
 
         Args:
             up: 主播实例
+            changeset: 相对于旧配置的变更集，会随 DataSourceUpdated 事件一同发出。默认：None
         """
-        if up.uid not in self.uids:
+        if up.uid not in self.__loaded_map():
             raise DataSourceException(f"主播 (UID: {up.uid}) 不存在于数据源中")
+        self.__check(up)
+        up = up.with_changeset(None)
+
+        if self.__ring is not None:
+            self.__loaded[up.uid] = up
+            if up.uid not in self.__current():
+                return
+
+        start = time.perf_counter()
+        with self.__lock:
+            builder = self.__stage()
+            old = builder.put(up)
+            self.__changelog.record(
+                builder.generation, DataSourceEvent.DataSourceUpdated, [up], {up.uid: changeset}
+            )
+        self.__report_sizes()
+
+        self.__dispatch(DataSourceEvent.DataSourceUpdated, up.with_changeset(changeset), old)
+        self.__report_apply(start, 0, 0, 1, {DataSourceEvent.DataSourceUpdated.value: 1})
+
+    def add_many(self, ups: Iterable[Up]) -> NoReturn:
+        """
+        批量添加主播
+
+        Args:
+            ups: 主播实例
+        """
+        self.apply_changes(added=ups)
+
+    def remove_many(self, uids: Iterable[int]) -> NoReturn:
+        """
+        批量移除主播
+
+        Args:
+            uids: 主播 UID
+        """
+        self.apply_changes(removed=uids)
+
+    def apply_changes(self,
+                      added: Iterable[Up] = (),
+                      removed: Iterable[int] = (),
+                      updated: Iterable[Up] = (),
+                      changesets: Optional[Dict[int, UpChangeSet]] = None) -> NoReturn:
+        """
+        批量应用主播变更，依次执行移除、添加、更新
+        应用前会完整检查变更是否合法，包括变更之间的冲突、推送目标之间的约束与推送内容模板，
+        检查不通过时抛出包含全部问题的校验报告，数据源不会发生任何变化
+        全部变更作为一次变更应用，快照版本号只递增 1
+        应用后发出一次 DataSourceBatchChanged 事件，开启逐个主播事件时，同时为每个主播发出对应的事件
+        DataSourceBatchChanged 事件仅发送给直接监听该事件的监听器，监听 DataSourceEvent 的监听器不会收到
+        启用发出队列时，逐个主播事件会加入队列按优先级与速率限制发出，DataSourceBatchChanged 事件仍立即发出
+        启用分片时，不属于当前分片的变更仅会被记录，不会发出事件
+
+        Args:
+            added: 要添加的主播实例。默认：()
+            removed: 要移除的主播 UID。默认：()
+            updated: 要更新的主播实例。默认：()
+            changesets: 更新主播的变更集字典，键为主播 UID。默认：None
+        """
+        added = [up.with_changeset(None) for up in added]
+        removed = list(removed)
+        updated = [up.with_changeset(None) for up in updated]
+        changesets = changesets or {}
+        loaded = self.__loaded_map()
+
+        problems = []
+
+        removed_uids = set()
+        for uid in removed:
+            if uid not in loaded:
+                problems.append(f"主播 (UID: {uid}) 不存在于数据源中")
+            elif uid in removed_uids:
+                problems.append(f"不可重复移除主播 (UID: {uid})")
+            removed_uids.add(uid)
+
+        added_uids = set()
+        for up in added:
+            if up.uid in added_uids or (up.uid in loaded and up.uid not in removed_uids):
+                problems.append(f"数据源中不可含有重复的主播 (UID: {up.uid})")
+            added_uids.add(up.uid)
+
+        updated_uids = set()
+        for up in updated:
+            if up.uid not in loaded or up.uid in removed_uids:
+                problems.append(f"主播 (UID: {up.uid}) 不存在于数据源中")
+            elif up.uid in added_uids or up.uid in updated_uids:
+                problems.append(f"不可在同一批变更中重复修改主播 (UID: {up.uid})")
+            updated_uids.add(up.uid)
+
+        for up in added + updated:
+            problems.extend(check_up(up))
+
+        if problems:
+            raise DataSourceException(format_problems(problems))
+
+        if not (added or removed or updated):
+            return
+
+        if self.__ring is not None:
+            for uid in removed:
+                del self.__loaded[uid]
+            for up in added + updated:
+                self.__loaded[up.uid] = up
+
+            current = self.__current()
+            added = [up for up in added if self.owns(up.uid)]
+            removed = [uid for uid in removed if uid in current]
+            updated = [up for up in updated if up.uid in current]
+
+        self.__apply(added, removed, updated, changesets)
+
+    def __apply(self,
+                added: List[Up],
+                removed: List[int],
+                updated: List[Up],
+                changesets: Dict[int, UpChangeSet]) -> NoReturn:
+        """
+        将已检查的变更应用到当前快照并发出事件，变更均需属于当前分片
 
-        old = self.__up_map.get(up.uid)
-        self.ups.remove(old)
-        self.uids.remove(old.uid)
-        self.__up_map.pop(old.uid)
-        self.ups.add(up)
-        self.uids.add(up.uid)
-        self.__up_map[up.uid] = up
+        Args:
+            added: 要添加的主播实例
+            removed: 要移除的主播 UID
+            updated: 要更新的主播实例
+            changesets: 更新主播的变更集字典，键为主播 UID
+        """
+        if not (added or removed or updated):
+            return
 
-        executor.dispatch(up, EventType.DataSourceEvent, DataSourceEvent.DataSourceUpdated)
+        start = time.perf_counter()
+        with self.__lock:
+            builder = self.__stage()
+            removed_ups = [builder.pop(uid) for uid in removed]
+            for up in added:
+                builder.put(up)
+            replaced_ups = [builder.put(up) for up in updated]
+
+            generation = builder.generation
+            self.__changelog.record(generation, DataSourceEvent.DataSourceRemoved, removed_ups)
+            self.__changelog.record(generation, DataSourceEvent.DataSourceAdded, added)
+            self.__changelog.record(generation, DataSourceEvent.DataSourceUpdated, updated, changesets)
+        self.__report_sizes()
+
+        # 变更集仅随事件中的主播实例拷贝发出，数据源中保存的主播实例不携带变更集
+        updated = [up.with_changeset(changesets.get(up.uid)) for up in updated]
+        changes = DataSourceChangeSet(added=added, removed=removed_ups, updated=updated)
+        # 不递归调用 DataSourceEvent 主题的监听器，以免仅处理逐个主播事件的监听器收到 DataSourceChangeSet
+        executor.dispatch(changes, EventType.DataSourceEvent, DataSourceEvent.DataSourceBatchChanged, recursion=False)
+
+        events = {DataSourceEvent.DataSourceBatchChanged.value: 1}
+        if self.__per_up_events():
+            for up in removed_ups:
+                self.__dispatch(DataSourceEvent.DataSourceRemoved, up)
+            for up in added:
+                self.__dispatch(DataSourceEvent.DataSourceAdded, up)
+            for up, old in zip(updated, replaced_ups):
+                self.__dispatch(DataSourceEvent.DataSourceUpdated, up, old)
+            events[DataSourceEvent.DataSourceRemoved.value] = len(removed_ups)
+            events[DataSourceEvent.DataSourceAdded.value] = len(added)
+            events[DataSourceEvent.DataSourceUpdated.value] = len(updated)
+
+        self.__report_apply(start, len(added), len(removed_ups), len(updated), events)
+
+    def reshard(self, index: int, count: Optional[int] = None) -> NoReturn:
+        """
+        调整当前实例负责的分片，并以 DataSourceAdded / DataSourceRemoved 事件发出当前实例新增与移交的主播
+        分片数量变化时，基于一致性哈希只有约 1/N 的主播会改变所属分片
+
+        Args:
+            index: 新的分片序号，从 0 开始
+            count: 新的分片数量，为 None 时保持不变。默认：None
+        """
+        count = self.shard_count if count is None else count
+        if count == self.shard_count and index == self.__shard_index:
+            return
+
+        if count > 1:
+            virtual_nodes = self.__ring.virtual_nodes if self.__ring is not None else _SHARD_VIRTUAL_NODES()
+            ring = HashRing(count, virtual_nodes) if count != self.shard_count else self.__ring
+        else:
+            ring = None
+
+        loaded = dict(self.__loaded_map())
+        self.__set_shard(index, ring)
+        self.__loaded = loaded if ring is not None else {}
+
+        current = self.__current()
+        gained = [up for uid, up in loaded.items() if uid not in current and self.owns(uid)]
+        lost = [uid for uid in current.up_map if not self.owns(uid)]
+
+        logger.info(f"当前实例已调整为负责第 {index} 个分片 (共 {count} 个分片), "
+                    f"新增了 {len(gained)} 个主播, 移交了 {len(lost)} 个主播")
+
+        self.__apply(gained, lost, [], {})
+
+    def reconcile(self, new_ups: List[Up], scope: Optional[Iterable[int]] = None) -> NoReturn:
+        """
+        将数据源与重新读取的主播配置进行比较，并以一批变更应用差异，配置内容未发生变化的主播不会发出事件
+        重新读取的配置会先在旁路完整检查，检查不通过时抛出校验报告，数据源保持原有配置继续提供服务
+
+        Args:
+            new_ups: 重新读取的主播实例
+            scope: 本次重新读取所覆盖的主播 UID，为 None 时表示 new_ups 为完整配置，
+                   否则仅比较此范围内的主播，范围内但不在 new_ups 中的主播视为已移除。默认：None
+        """
+        start = time.perf_counter()
+        new_up_map = {up.uid: up for up in new_ups}
+        if len(new_up_map) != len(new_ups):
+            problems = check_duplicates(new_ups)
+            for up in new_ups:
+                problems.extend(check_up(up))
+            raise DataSourceException(format_problems(problems))
+
+        loaded = self.__loaded_map()
+        scope = loaded.keys() if scope is None else set(scope) | new_up_map.keys()
+
+        added_ups = [up for uid, up in new_up_map.items() if uid not in loaded]
+        removed_uids = [uid for uid in scope if uid in loaded and uid not in new_up_map]
+
+        updated_ups = {}
+        for uid, up in new_up_map.items():
+            if uid not in loaded:
+                continue
+            changeset = diff_up(loaded[uid], up)
+            if changeset is not None:
+                updated_ups[up] = changeset
+
+        self.__metrics.stage(self.name, "diff", time.perf_counter() - start)
+        self.__metrics.ups_changed(self.name, "skipped", len(new_up_map) - len(added_ups) - len(updated_ups))
+
+        tip = [
+            f'{act}了 {len(ups)} 个主播'
+            for act, ups in [('新增', added_ups), ('移除', removed_uids), ('更新', updated_ups)] if ups
+        ]
+        if tip:
+            logger.info(f"检测到 {', '.join(tip)}")
+        else:
+            logger.info("未检测到主播配置发生变化")
+
+        self.apply_changes(
+            added=added_ups,
+            removed=removed_uids,
+            updated=updated_ups,
+            changesets={up.uid: changeset for up, changeset in updated_ups.items()}
+        )
 
 
 class JsonDataSource(DataSource):
@@ -95,115 +694,278 @@ class JsonDataSource(DataSource):
     """
     def __init__(self):
         super().__init__()
-        self.__config = None
+        self.__digest: Optional[Digest] = None
+        self.__cached_digest: Optional[Digest] = None
+        self.__skipped_reloads = 0
+        self.__process_pool: Optional[ProcessPoolExecutor] = None
+        self.__task: Optional[asyncio.Task] = None
+        self.__reload_lock = asyncio.Lock()
 
         self.__json_file = config.get("datasource.json_datasource.file_path", str, "推送配置.json")
         self.__auto_reload = config.get("datasource.json_datasource.auto_reload", bool, True)
         self.__auto_reload_interval = config.get("datasource.json_datasource.auto_reload_interval", int, 5)
+        self.__auto_reload_debounce = config.option(
+            "datasource.json_datasource.auto_reload_debounce", int, 300, optional=True
+        )
+        self.__watcher = config.option("datasource.json_datasource.watcher", str, "auto", optional=True)
+        self.__parse_executor = _JSON_PARSE_EXECUTOR()
+        self.__streaming = _JSON_STREAMING()
+        self.__stream_batch_size = _JSON_STREAM_BATCH_SIZE()
+        self.__snapshot_cache = _JSON_SNAPSHOT_CACHE()
+
+        if self.__parse_executor not in ("thread", "process"):
+            logger.warning(f"不支持的配置解析方式: {self.__parse_executor}, 已使用默认值: thread")
+            self.__parse_executor = "thread"
+
+        if self.__streaming and self.__parse_executor == "process":
+            logger.warning("流式读取模式不支持在进程池中解析配置, 已使用线程池解析")
+            self.__parse_executor = "thread"
+
+    @property
+    def skipped_reloads(self) -> int:
+        """
+        因文件内容未发生变化而跳过解析的重载次数
+        """
+        return self.__skipped_reloads
+
+    async def __load_json_file(self) -> Tuple[Digest, Optional[List[Up]]]:
+        """
+        在线程池或进程池中读取、解析并校验 JSON 文件，避免阻塞事件循环
+
+        Returns:
+            (文件内容摘要, 主播实例列表)，文件内容未发生变化时主播实例列表为 None
+        """
+        pool = None
+        if self.__parse_executor == "process":
+            if self.__process_pool is None:
+                self.__process_pool = ProcessPoolExecutor(max_workers=1)
+            pool = self.__process_pool
+
+        loop = asyncio.get_running_loop()
+        load = stream_json_file if self.__streaming else load_json_file
+        digest, ups, timings = await loop.run_in_executor(pool, load_timed, load, self.__json_file, self.__digest)
+
+        self.metrics.bytes_read(self.name, digest[0])
+        for stage, seconds in timings.items():
+            self.metrics.stage(self.name, stage, seconds)
+        return digest, ups
+
+    async def __stream_json_file(self) -> AsyncIterator[List[Up]]:
+        """
+        在线程池中流式读取 JSON 文件，每校验完一批主播就立即产出，以便在读取完整个文件前开始添加主播
+        读取开始前会先计算文件内容摘要并记录，供之后的重载比较
+
+        Returns:
+            主播实例批次的异步迭代器
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=4)
+        stopped = threading.Event()
+
+        def put(item) -> NoReturn:
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def produce() -> NoReturn:
+            try:
+                self.__digest = get_file_digest(self.__json_file)
+                batch = []
+                for up in iter_ups(self.__json_file):
+                    batch.append(up)
+                    if len(batch) >= self.__stream_batch_size:
+                        if stopped.is_set():
+                            return
+                        put(batch)
+                        batch = []
+                put(batch)
+                put(None)
+            except Exception as ex:
+                if not stopped.is_set():
+                    put(ex)
+
+        producer = loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+            while not queue.empty():
+                queue.get_nowait()
+            await producer
 
     async def load(self) -> NoReturn:
         """
         从 JSON 字符串中初始化配置
         """
-        if self.ups:
+        if self.loaded_ups:
             return
 
         logger.info("已选用 JSON 作为 Bot 数据源")
         logger.info("开始从 JSON 中初始化 Bot 配置")
 
+        watcher = None
         try:
+            # 在首次读取前创建文件变化监视器，读取期间发生的文件变化同样会触发重载
             modify_time = os.path.getmtime(self.__json_file)
-            with open(self.__json_file, encoding="utf-8") as file:
-                content = file.read()
+            if self.__auto_reload:
+                watcher = create_watcher(self.__json_file, self.__watcher(), self.__auto_reload_interval, modify_time)
+
+            try:
+                if self.__snapshot_cache and await self.__load_snapshot_cache():
+                    logger.info("JSON 文件内容未发生变化, 已从快照缓存中读取配置")
+                elif self.__streaming:
+                    await self.__stream_load()
+                else:
+                    digest, ups = await self.__load_json_file()
+                    self.add_many(ups)
+                    self.__digest = digest
+            except BaseException:
+                if watcher is not None:
+                    watcher.close()
+                raise
         except FileNotFoundError:
             raise DataSourceException("JSON 文件不存在, 请检查文件路径是否正确")
         except UnicodeDecodeError:
             raise DataSourceException("JSON 文件编码不正确, 请将其转换为 UTF-8 格式编码后重试")
+        except JSONDecodeError:
+            raise DataSourceException("JSON 文件内容格式不正确")
+        except DataSourceException:
+            raise
         except Exception as ex:
             raise DataSourceException(f"读取 JSON 文件异常 {ex}")
 
-        try:
-            self.__config = json.loads(content)
-        except Exception:
-            raise DataSourceException("JSON 文件内容格式不正确")
-
-        if isinstance(self.__config, dict):
-            self.__config = [self.__config]
+        logger.success(f"成功从 JSON 中导入了 {len(self.ups)} 个 UP 主")
 
-        for up in self.__config:
-            try:
-                self.add(Up(**up))
-            except ValidationError as ex:
-                raise DataSourceException(f"提供的配置字典中缺少必须的 {ex.errors()[0].get('loc')[-1]} 参数")
+        if self.__snapshot_cache:
+            executor.create_task(self.__write_snapshot_cache())
 
-        logger.success(f"成功从 JSON 中导入了 {len(self.ups)} 个 UP 主")
+        if watcher is not None:
+            self.__task = executor.create_task(self.__auto_reload_task(watcher))
 
-        if self.__auto_reload:
-            executor.create_task(self.__auto_reload_task(modify_time))
+    async def close(self) -> NoReturn:
+        """
+        停止自动重载并关闭解析配置使用的进程池
+        """
+        await super().close()
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+        if self.__process_pool is not None:
+            self.__process_pool.shutdown(wait=False, cancel_futures=True)
+            self.__process_pool = None
+
+    async def __load_snapshot_cache(self) -> bool:
+        """
+        尝试从快照缓存中初始化配置，缓存与 JSON 文件内容一致时可跳过解析与校验
 
-    async def __auto_reload_task(self, modify_time: float) -> NoReturn:
+        Returns:
+            是否成功从快照缓存中初始化
         """
-        JSON 文件内容发生变化时自动重载配置
+        loop = asyncio.get_running_loop()
+        digest, ups = await loop.run_in_executor(None, read_snapshot_cache, self.__json_file)
+        if ups is None:
+            return False
 
-        Args:
-            modify_time: 配置文件修改时间
+        self.add_many(ups)
+        self.__digest = digest
+        self.__cached_digest = digest
+        return True
+
+    async def __write_snapshot_cache(self) -> NoReturn:
         """
-        while True:
-            await asyncio.sleep(self.__auto_reload_interval)
-            try:
-                new_modify_time = os.path.getmtime(self.__json_file)
+        将当前配置写入快照缓存，缓存已与当前 JSON 文件内容一致时不会重复写入
+        """
+        digest = self.__digest
+        if digest is None or digest == self.__cached_digest:
+            return
 
-                if new_modify_time == modify_time:
-                    continue
+        ups = self.loaded_ups
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, write_snapshot_cache, self.__json_file, digest, ups):
+            self.__cached_digest = digest
 
-                modify_time = new_modify_time
+    async def __stream_load(self) -> NoReturn:
+        """
+        以流式读取方式初始化配置，每校验完一批主播就立即添加到数据源中
+        读取过程中出现错误时，会移除本次已添加的主播后再抛出异常
+        """
+        added = []
+        try:
+            async for batch in self.__stream_json_file():
+                self.add_many(batch)
+                added.extend(up.uid for up in batch)
+        except Exception:
+            self.__digest = None
+            if added:
+                self.remove_many(added)
+            raise
 
-                logger.info(f"数据源配置已更新, 开始重载配置")
+    async def __auto_reload_task(self, watcher: FileWatcher) -> NoReturn:
+        """
+        JSON 文件内容发生变化时自动重载配置
 
-                with open(self.__json_file, encoding="utf-8") as file:
-                    content = file.read()
+        Args:
+            watcher: 首次读取前创建的文件变化监视器
+        """
+        scheduler = ReloadScheduler(self.__reload, self.__auto_reload_debounce() / 1000)
+        try:
+            while True:
+                await watcher.wait()
+                scheduler.notify()
+        finally:
+            watcher.close()
+            scheduler.close()
+
+    async def reload(self) -> NoReturn:
+        """
+        立即重新读取 JSON 文件并应用配置变化，无需等待文件变化触发自动重载
+        与自动重载共用同一把锁，自动重载正在执行时会等待其完成后再重新读取
+        """
+        await self.__reload()
 
-                conf = json.loads(content)
-                if isinstance(conf, dict):
-                    conf = [conf]
+    async def __reload(self) -> NoReturn:
+        """
+        重新读取 JSON 文件并应用配置变化，手动重载与自动重载同一时间至多执行一次
+        """
+        async with self.__reload_lock:
+            await self.__reload_file()
 
-                new_ups = []
-                for up in conf:
-                    new_ups.append(Up(**up))
+    async def __reload_file(self) -> NoReturn:
+        """
+        重新读取 JSON 文件并应用配置变化，调用方需持有重载锁
+        """
+        start = time.perf_counter()
+        try:
+            digest, new_ups = await self.__load_json_file()
+            if new_ups is None:
+                self.__skipped_reloads += 1
+                self.metrics.reload_finished(self.name, "skipped", time.perf_counter() - start)
+                logger.debug("数据源配置文件内容未发生变化, 已跳过重载")
+                return
 
-                new_up_set = set(new_ups)
-                if len(new_up_set) != len(new_ups):
-                    raise DataSourceException("数据源中不可含有重复的主播")
+            logger.info(f"数据源配置已更新, 开始重载配置")
 
-                self.__config = conf
+            self.reconcile(new_ups)
 
-                added_ups = new_up_set - self.ups
-                removed_ups = self.ups - new_up_set
+            self.__digest = digest
+            self.metrics.reload_finished(self.name, "applied", time.perf_counter() - start)
+            logger.success("数据源配置重载成功")
 
-                tip = [f'{act}了 {len(ups)} 个主播' for act, ups in [('新增', added_ups), ('移除', removed_ups)] if ups]
-                if tip:
-                    logger.info(f"检测到 {', '.join(tip)}")
-                else:
-                    logger.info("未检测到新增或移除的主播, 开始重载已存在主播的配置")
-
-                for up in new_up_set.union(self.ups):
-                    if up in added_ups:
-                        self.add(up)
-                    elif up in removed_ups:
-                        self.remove(up.uid)
-                    else:
-                        self.update(up)
-
-                logger.success("数据源配置重载成功")
-            except FileNotFoundError:
+            if self.__snapshot_cache:
+                await self.__write_snapshot_cache()
+        except Exception as ex:
+            self.metrics.reload_failed(self.name, ex, time.perf_counter() - start)
+            if isinstance(ex, FileNotFoundError):
                 logger.error("数据源配置 JSON 文件不存在")
-            except UnicodeDecodeError:
+            elif isinstance(ex, UnicodeDecodeError):
                 logger.error("数据源配置 JSON 文件编码不正确, 请将其转换为 UTF-8 格式编码")
-            except JSONDecodeError:
+            elif isinstance(ex, JSONDecodeError):
                 logger.error("数据源配置 JSON 文件内容格式不正确")
-            except DataSourceException as ex:
+            elif isinstance(ex, DataSourceException):
                 logger.error(ex.msg)
-            except Exception as ex:
+            else:
                 logger.error(f"数据源自动重载任务异常 {ex}")
-            finally:
-                continue
@@ -0,0 +1,46 @@
+from typing import Dict, Optional, Tuple, Union
+
+from ..core.model import Up, PushTarget, Platform, UpChangeSet
+
+
+def _target_map(up: Up) -> Dict[Tuple[Union[int, str], Platform], PushTarget]:
+    """
+    以 (推送目标标识符, 推送平台) 为键构建推送目标字典
+
+    Args:
+        up: 主播实例
+
+    Returns:
+        推送目标字典
+    """
+    return {(target.id, target.platform): target for target in up.targets}
+
+
+def diff_up(old: Up, new: Up) -> Optional[UpChangeSet]:
+    """
+    按内容比较同一主播的新旧配置
+
+    Args:
+        old: 旧主播实例
+        new: 新主播实例
+
+    Returns:
+        配置未发生变化时返回 None，否则返回变更集
+    """
+    if old.model_dump() == new.model_dump():
+        return None
+
+    old_targets = _target_map(old)
+    new_targets = _target_map(new)
+
+    changeset = UpChangeSet(uid=new.uid)
+    for key, target in new_targets.items():
+        if key not in old_targets:
+            changeset.added.append(target)
+        elif old_targets[key].model_dump() != target.model_dump():
+            changeset.modified.append(target)
+    for key, target in old_targets.items():
+        if key not in new_targets:
+            changeset.removed.append(target)
+
+    return changeset
@@ -0,0 +1,365 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from json import JSONDecodeError
+from typing import Dict, FrozenSet, List, NamedTuple, NoReturn, Optional, Set, Tuple, Union
+
+from loguru import logger
+from starbot_executor import executor
+
+from .. import config
+from ..core.datasource import DataSource
+from ..core.loader import Digest, load_json_file
+from ..core.model import Up
+from ..core.scheduler import ReloadScheduler
+from ..core.validator import format_problems
+from ..core.watcher import FileWatcher, create_watcher
+from ..exception.DataSourceException import DataSourceException
+
+FileStat = Tuple[int, int]
+"""文件状态，(修改时间纳秒数, 文件大小)"""
+
+LoadResult = Union[Tuple[Digest, Optional[List[Up]]], Exception]
+"""单个文件的读取结果，(文件内容摘要, 主播实例列表) 或加载失败时的异常"""
+
+
+class FileState(NamedTuple):
+    """
+    目录中单个配置文件的加载状态
+    """
+
+    stat: FileStat
+    """上次成功加载时的文件状态"""
+
+    digest: Digest
+    """上次成功加载时的文件内容摘要"""
+
+    uids: FrozenSet[int]
+    """上次成功加载时文件中的主播 UID"""
+
+
+def scan_directory(directory: str) -> Dict[str, FileStat]:
+    """
+    列出目录中的全部 JSON 文件及其状态，不读取文件内容
+
+    Args:
+        directory: 目录路径
+
+    Returns:
+        文件名与文件状态的字典
+    """
+    files = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".json") or entry.name.startswith("."):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def load_json_files(directory: str,
+                    files: Dict[str, Optional[Digest]]) -> Dict[str, LoadResult]:
+    """
+    依次读取、解析并校验目录中的多个 JSON 文件，单个文件失败不影响其余文件
+
+    Args:
+        directory: 目录路径
+        files: 文件名与上次成功加载的文件内容摘要的字典
+
+    Returns:
+        文件名与 (文件内容摘要, 主播实例列表) 的字典，文件内容未发生变化时主播实例列表为 None，加载失败时值为异常
+    """
+    results = {}
+    for name, last_digest in files.items():
+        try:
+            results[name] = load_json_file(os.path.join(directory, name), last_digest)
+        except Exception as ex:
+            results[name] = ex
+    return results
+
+
+def _describe_error(name: str, ex: Exception) -> str:
+    """
+    生成单个配置文件加载失败的提示信息
+
+    Args:
+        name: 文件名
+        ex: 加载时产生的异常
+
+    Returns:
+        提示信息
+    """
+    if isinstance(ex, FileNotFoundError):
+        return f"JSON 文件 {name} 不存在"
+    if isinstance(ex, UnicodeDecodeError):
+        return f"JSON 文件 {name} 编码不正确, 请将其转换为 UTF-8 格式编码"
+    if isinstance(ex, JSONDecodeError):
+        return f"JSON 文件 {name} 内容格式不正确"
+    if isinstance(ex, DataSourceException):
+        return f"JSON 文件 {name} 中{ex.msg}"
+    return f"读取 JSON 文件 {name} 异常 {ex}"
+
+
+class JsonDirectoryDataSource(DataSource):
+    """
+    使用目录中的多个 JSON 文件初始化的推送配置数据源
+    每个文件的格式与 JsonDataSource 的配置文件相同，重载时仅重新解析修改时间或大小发生变化的文件，
+    并仅比较这些文件涉及的主播，同一主播不可同时出现在多个文件中
+    """
+    def __init__(self):
+        super().__init__()
+        self.__files: Dict[str, FileState] = {}
+        self.__owners: Dict[int, str] = {}
+        self.__failed: Dict[str, FileStat] = {}
+        self.__skipped_reloads = 0
+        self.__worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="JsonDirectoryDataSource")
+
+        self.__directory = config.get("datasource.json_directory_datasource.directory_path", str, "推送配置")
+        self.__auto_reload = config.get("datasource.json_directory_datasource.auto_reload", bool, True)
+        self.__auto_reload_interval = config.get("datasource.json_directory_datasource.auto_reload_interval", int, 5)
+        self.__auto_reload_debounce = config.option(
+            "datasource.json_directory_datasource.auto_reload_debounce", int, 300, optional=True
+        )
+        self.__watcher = config.option("datasource.json_directory_datasource.watcher", str, "auto", optional=True)
+
+    @property
+    def skipped_reloads(self) -> int:
+        """
+        因文件均未发生变化而跳过解析的重载次数
+        """
+        return self.__skipped_reloads
+
+    @property
+    def files(self) -> Dict[str, FrozenSet[int]]:
+        """
+        已加载的文件名与文件中主播 UID 的字典
+        """
+        return {name: state.uids for name, state in self.__files.items()}
+
+    async def __run(self, func, *args):
+        """
+        在文件读取专用线程中执行阻塞调用
+
+        Args:
+            func: 要执行的函数
+            args: 函数参数
+
+        Returns:
+            函数返回值
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__worker, func, *args)
+
+    async def load(self) -> NoReturn:
+        """
+        从目录中的全部 JSON 文件初始化配置
+        """
+        if self.loaded_ups:
+            return
+
+        logger.info("已选用 JSON 目录作为 Bot 数据源")
+        logger.info("开始从 JSON 目录中初始化 Bot 配置")
+
+        if not os.path.isdir(self.__directory):
+            if os.path.exists(self.__directory):
+                raise DataSourceException("JSON 配置目录路径不是目录, 请检查目录路径是否正确")
+            raise DataSourceException("JSON 配置目录不存在, 请检查目录路径是否正确")
+
+        # 在首次扫描前创建目录变化监视器，扫描与读取期间发生的文件变化同样会触发重载
+        watcher = None
+        if self.__auto_reload:
+            watcher = create_watcher(self.__directory, self.__watcher(), self.__auto_reload_interval, directory=True)
+
+        try:
+            self.__load_files(*await self.__read_directory())
+        except BaseException:
+            if watcher is not None:
+                watcher.close()
+            raise
+
+        logger.success(f"成功从 {len(self.__files)} 个 JSON 文件中导入了 {len(self.ups)} 个 UP 主")
+
+        if watcher is not None:
+            executor.create_task(self.__auto_reload_task(watcher))
+
+    async def __read_directory(self) -> Tuple[Dict[str, FileStat], Dict[str, LoadResult]]:
+        """
+        扫描目录并读取其中的全部 JSON 文件
+
+        Returns:
+            (文件状态, 各文件的读取结果)
+        """
+        try:
+            stats = await self.__run(scan_directory, self.__directory)
+        except FileNotFoundError:
+            raise DataSourceException("JSON 配置目录不存在, 请检查目录路径是否正确")
+        except NotADirectoryError:
+            raise DataSourceException("JSON 配置目录路径不是目录, 请检查目录路径是否正确")
+        except Exception as ex:
+            raise DataSourceException(f"读取 JSON 配置目录异常 {ex}")
+
+        results = await self.__run(load_json_files, self.__directory, dict.fromkeys(stats))
+        return stats, results
+
+    def __load_files(self, stats: Dict[str, FileStat], results: Dict[str, LoadResult]) -> NoReturn:
+        """
+        将首次读取的全部 JSON 文件中的主播添加到数据源中
+
+        Args:
+            stats: 文件状态
+            results: 各文件的读取结果
+        """
+        for name in sorted(results):
+            if isinstance(results[name], Exception):
+                raise DataSourceException(_describe_error(name, results[name]))
+
+        owners: Dict[int, str] = {}
+        files: Dict[str, FileState] = {}
+        problems = []
+        ups = []
+        for name in sorted(results):
+            digest, file_ups = results[name]
+            uids = frozenset(up.uid for up in file_ups)
+            if len(uids) != len(file_ups):
+                problems.append(f"JSON 文件 {name} 中含有重复的主播")
+            for uid in sorted(uids):
+                if uid in owners:
+                    problems.append(f"主播 (UID: {uid}) 同时出现在 JSON 文件 {owners[uid]} 与 {name} 中")
+                else:
+                    owners[uid] = name
+
+            files[name] = FileState(stats[name], digest, uids)
+            ups.extend(file_ups)
+
+        if problems:
+            raise DataSourceException(format_problems(problems))
+
+        self.__owners.update(owners)
+        self.__files.update(files)
+        self.add_many(ups)
+
+    async def __auto_reload_task(self, watcher: FileWatcher) -> NoReturn:
+        """
+        目录中的 JSON 文件发生变化时自动重载配置
+
+        Args:
+            watcher: 首次扫描前创建的目录变化监视器
+        """
+        scheduler = ReloadScheduler(self.__reload, self.__auto_reload_debounce() / 1000)
+        try:
+            while True:
+                await watcher.wait()
+                scheduler.notify()
+        finally:
+            watcher.close()
+            scheduler.close()
+
+    async def __reload(self) -> NoReturn:
+        """
+        重新读取发生变化的 JSON 文件并应用配置变化
+        """
+        start = time.perf_counter()
+        try:
+            applied = await self.__reload_changed_files()
+            self.metrics.reload_finished(self.name, "applied" if applied else "skipped", time.perf_counter() - start)
+        except Exception as ex:
+            self.metrics.reload_failed(self.name, ex, time.perf_counter() - start)
+            if isinstance(ex, FileNotFoundError):
+                logger.error("数据源配置 JSON 目录不存在")
+            elif isinstance(ex, DataSourceException):
+                logger.error(ex.msg)
+            else:
+                logger.error(f"数据源自动重载任务异常 {ex}")
+
+    async def __reload_changed_files(self) -> bool:
+        """
+        比较文件状态找出新增、删除与修改的文件，仅解析新增与修改的文件，并以这些文件涉及的主播为范围应用差异
+        加载失败的文件保留上次成功加载的主播配置，直至文件状态再次发生变化时重试
+
+        Returns:
+            是否应用了配置变化
+        """
+        stats = await self.__run(scan_directory, self.__directory)
+
+        deleted = [name for name in self.__files if name not in stats]
+        changed = {
+            name: self.__files[name].digest if name in self.__files else None
+            for name, stat in stats.items()
+            if (name not in self.__files or self.__files[name].stat != stat) and self.__failed.get(name) != stat
+        }
+        self.__failed = {name: stat for name, stat in self.__failed.items() if stats.get(name) == stat}
+
+        if not deleted and not changed:
+            self.__skipped_reloads += 1
+            return False
+
+        results = await self.__run(load_json_files, self.__directory, changed) if changed else {}
+
+        new_states: Dict[str, FileState] = {}
+        new_ups: Dict[str, List[Up]] = {}
+        for name, result in results.items():
+            if isinstance(result, Exception):
+                logger.error(f"{_describe_error(name, result)}, 已保留此文件上次成功加载的配置")
+                self.__failed[name] = stats[name]
+                continue
+
+            digest, file_ups = result
+            self.metrics.bytes_read(self.name, digest[0])
+            if file_ups is None:
+                self.__files[name] = self.__files[name]._replace(stat=stats[name])
+                continue
+
+            uids = frozenset(up.uid for up in file_ups)
+            if len(uids) != len(file_ups):
+                logger.error(f"JSON 文件 {name} 中含有重复的主播, 已保留此文件上次成功加载的配置")
+                self.__failed[name] = stats[name]
+                continue
+
+            new_states[name] = FileState(stats[name], digest, uids)
+            new_ups[name] = file_ups
+
+        if not deleted and not new_states:
+            self.__skipped_reloads += 1
+            logger.debug("数据源配置文件内容未发生变化, 已跳过重载")
+            return False
+
+        touched = deleted + list(new_states)
+        owners = {uid: name for uid, name in self.__owners.items() if name not in touched}
+        problems = []
+        conflicted: Set[str] = set()
+        for name in sorted(new_states):
+            for uid in sorted(new_states[name].uids):
+                if uid in owners:
+                    problems.append(f"主播 (UID: {uid}) 同时出现在 JSON 文件 {owners[uid]} 与 {name} 中")
+                    conflicted.add(name)
+                    if owners[uid] in new_states:
+                        conflicted.add(owners[uid])
+                else:
+                    owners[uid] = name
+        if problems:
+            for name in conflicted:
+                self.__failed[name] = stats[name]
+            raise DataSourceException(format_problems(problems))
+
+        scope: Set[int] = set()
+        for name in touched:
+            if name in self.__files:
+                scope |= self.__files[name].uids
+
+        logger.info(f"数据源配置已更新, 开始重载 {len(touched)} 个配置文件")
+
+        self.reconcile([up for ups in new_ups.values() for up in ups], scope)
+
+        for name in deleted:
+            del self.__files[name]
+        self.__files.update(new_states)
+        self.__owners = owners
+        logger.success("数据源配置重载成功")
+        return True
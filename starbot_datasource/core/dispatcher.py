@@ -0,0 +1,284 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, List, NoReturn, Optional, Tuple
+
+from starbot_executor import executor
+
+from ..core.diff import diff_up
+from ..core.event import EventType, DataSourceEvent
+from ..core.metrics import MetricsHook, NullMetrics
+from ..core.model import Up
+
+PRIORITY_REMOVED = 0
+"""移除事件的优先级，最先发出以尽快释放直播间连接"""
+
+PRIORITY_CONNECTION = 1
+"""影响直播间连接或动态轮询的新增与更新事件的优先级"""
+
+PRIORITY_COSMETIC = 2
+"""仅修改推送内容等不影响连接的更新事件的优先级"""
+
+
+def _connection_state(up: Optional[Up]) -> Tuple[bool, bool]:
+    """
+    获取主播与连接相关的能力，用于判断变更是否需要 Bot 建立或断开连接
+
+    Args:
+        up: 主播实例，为 None 时视为不需要任何连接
+
+    Returns:
+        (是否需要连接直播间, 是否需要轮询动态)
+    """
+    if up is None:
+        return False, False
+    capabilities = up.capabilities
+    return capabilities.need_connect, capabilities.need_dynamic
+
+
+def get_priority(event: DataSourceEvent, up: Up, previous: Optional[Up] = None) -> int:
+    """
+    获取事件的发出优先级，值越小越先发出
+
+    Args:
+        event: 事件类型
+        up: 主播实例
+        previous: 事件消费者已知的旧主播实例，新增事件为 None。默认：None
+
+    Returns:
+        事件优先级
+    """
+    if event == DataSourceEvent.DataSourceRemoved:
+        return PRIORITY_REMOVED
+    if _connection_state(previous) != _connection_state(up):
+        return PRIORITY_CONNECTION
+    return PRIORITY_COSMETIC
+
+
+class _Pending:
+    """
+    队列中等待发出的逐个主播事件，同一主播的后续事件会合并到此条目中
+    """
+
+    __slots__ = ("uid", "seq", "base", "event", "up", "priority")
+
+    def __init__(self, uid: int, seq: int, base: Optional[Up]):
+        self.uid = uid
+        self.seq = seq
+        self.base = base
+        """事件消费者已知的主播实例，为 None 时表示消费者尚未收到此主播"""
+        self.event: Optional[DataSourceEvent] = None
+        self.up: Optional[Up] = None
+        self.priority = PRIORITY_COSMETIC
+
+
+class DispatchQueue:
+    """
+    限速的优先级事件发出队列，位于数据源与 executor 之间，避免大批量重载后 Bot 同时重连大量直播间
+    事件按移除、影响连接的变更、仅修改推送内容的变更的优先级依次发出，同优先级内保持先后顺序
+    同一主播仍在队列中时，后续事件会与其合并，例如新增后更新合并为一次新增，新增后移除则两者均不再发出
+    发出速率由令牌桶控制，空闲时最多可连续发出 burst 个事件
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Args:
+            rate: 每秒最多发出的事件数量，小于等于 0 时不限速，仅按优先级排序与合并
+            burst: 令牌桶容量，即空闲后可连续发出的最大事件数量
+        """
+        self.__rate = rate
+        self.__burst = max(burst, 1)
+        self.__tokens = float(self.__burst)
+        self.__refilled = time.monotonic()
+
+        self.__heap: List[Tuple[int, int, int]] = []
+        self.__pending: Dict[int, _Pending] = {}
+        self.__counter = itertools.count()
+
+        self.__source = ""
+        self.__metrics: MetricsHook = NullMetrics()
+
+        self.__changed = asyncio.Event()
+        self.__empty = asyncio.Event()
+        self.__empty.set()
+        self.__task: Optional[asyncio.Task] = None
+
+    @property
+    def rate(self) -> float:
+        """
+        每秒最多发出的事件数量
+        """
+        return self.__rate
+
+    @property
+    def burst(self) -> int:
+        """
+        令牌桶容量
+        """
+        return self.__burst
+
+    @property
+    def depth(self) -> int:
+        """
+        队列中等待发出的事件数量
+        """
+        return len(self.__pending)
+
+    def __len__(self) -> int:
+        return len(self.__pending)
+
+    def set_metrics(self, source: str, hook: MetricsHook) -> NoReturn:
+        """
+        设置记录队列深度与合并事件数量使用的指标钩子
+
+        Args:
+            source: 数据源名称
+            hook: 指标钩子
+        """
+        self.__source = source
+        self.__metrics = hook
+        hook.queue_depth(source, len(self.__pending))
+
+    def put(self, event: DataSourceEvent, up: Up, previous: Optional[Up] = None) -> NoReturn:
+        """
+        将逐个主播事件加入队列，同一主播仍在队列中时与其合并，首次调用时启动发出任务
+
+        Args:
+            event: 事件类型，为 DataSourceAdded、DataSourceRemoved 或 DataSourceUpdated
+            up: 主播实例，移除事件为移除前的实例
+            previous: 更新事件的旧主播实例，其余事件无需传入。默认：None
+        """
+        pending = self.__pending.get(up.uid)
+        if pending is None:
+            base = up if event == DataSourceEvent.DataSourceRemoved else previous
+            pending = _Pending(up.uid, next(self.__counter), base)
+            self.__pending[up.uid] = pending
+            pending.event = event
+            pending.up = up
+            pending.priority = get_priority(event, up, previous)
+        else:
+            self.__metrics.events_coalesced(self.__source)
+            if not self.__coalesce(pending, event, up):
+                del self.__pending[up.uid]
+                self.__report_depth()
+                return
+
+        heapq.heappush(self.__heap, (pending.priority, pending.seq, up.uid))
+        self.__report_depth()
+
+        self.__empty.clear()
+        self.__changed.set()
+        if self.__task is None:
+            self.__task = executor.create_task(self.__run())
+
+    @staticmethod
+    def __coalesce(pending: _Pending, event: DataSourceEvent, up: Up) -> bool:
+        """
+        将新事件合并到队列中同一主播的事件，以消费者已知的主播实例与最新状态重新确定要发出的事件
+
+        Args:
+            pending: 队列中同一主播的事件
+            event: 新事件类型
+            up: 新事件的主播实例
+
+        Returns:
+            合并后是否仍需发出事件，消费者已知状态与最新状态相同时无需发出
+        """
+        base = pending.base
+        removed = event == DataSourceEvent.DataSourceRemoved
+
+        if base is None:
+            if removed:
+                return False
+            pending.event = DataSourceEvent.DataSourceAdded
+        elif removed:
+            pending.event = DataSourceEvent.DataSourceRemoved
+        else:
+            changeset = diff_up(base, up)
+            if changeset is None:
+                return False
+            up = up.with_changeset(changeset)
+            pending.event = DataSourceEvent.DataSourceUpdated
+
+        pending.up = up
+        pending.priority = get_priority(pending.event, up, base)
+        return True
+
+    def __report_depth(self) -> NoReturn:
+        self.__metrics.queue_depth(self.__source, len(self.__pending))
+
+    def __take_token(self) -> float:
+        """
+        尝试从令牌桶中取出一个令牌
+
+        Returns:
+            取出成功时返回 0，否则返回距离下一个令牌生成还需等待的时间（秒）
+        """
+        if self.__rate <= 0:
+            return 0
+
+        now = time.monotonic()
+        self.__tokens = min(self.__burst, self.__tokens + (now - self.__refilled) * self.__rate)
+        self.__refilled = now
+        if self.__tokens >= 1:
+            self.__tokens -= 1
+            return 0
+        return (1 - self.__tokens) / self.__rate
+
+    def __pop(self) -> Optional[_Pending]:
+        """
+        取出优先级最高的事件，跳过已被合并或丢弃的过期堆条目
+
+        Returns:
+            优先级最高的事件，队列为空时返回 None
+        """
+        while self.__heap:
+            priority, seq, uid = heapq.heappop(self.__heap)
+            pending = self.__pending.get(uid)
+            if pending is not None and pending.seq == seq and pending.priority == priority:
+                del self.__pending[uid]
+                return pending
+        return None
+
+    async def __run(self) -> NoReturn:
+        """
+        发出任务，按优先级与速率限制依次发出队列中的事件
+        """
+        while True:
+            if not self.__pending:
+                self.__heap.clear()
+                self.__empty.set()
+                self.__changed.clear()
+                await self.__changed.wait()
+                continue
+
+            wait = self.__take_token()
+            if wait:
+                await asyncio.sleep(wait)
+                continue
+
+            pending = self.__pop()
+            if pending is None:
+                continue
+
+            self.__report_depth()
+            executor.dispatch(pending.up, EventType.DataSourceEvent, pending.event)
+
+    async def join(self) -> NoReturn:
+        """
+        等待队列中的事件全部发出
+        """
+        await self.__empty.wait()
+
+    def close(self) -> NoReturn:
+        """
+        停止发出任务，队列中尚未发出的事件会被丢弃
+        """
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+        self.__heap.clear()
+        self.__pending.clear()
+        self.__empty.set()
+        self.__report_depth()
@@ -21,3 +21,6 @@ class DataSourceEvent(Enum):
 
     DataSourceUpdated = "DataSourceUpdated"
     """数据源主播更新"""
+
+    DataSourceBatchChanged = "DataSourceBatchChanged"
+    """数据源主播批量变更，附加数据为 DataSourceChangeSet，仅发送给直接监听此事件的监听器，监听 DataSourceEvent 的监听器不会收到"""
@@ -0,0 +1,344 @@
+import asyncio
+import gzip
+import http.client
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from json import JSONDecodeError
+from typing import Dict, List, NamedTuple, NoReturn, Optional, Tuple
+from urllib.parse import urlsplit
+
+from loguru import logger
+from starbot_executor import executor
+
+from .. import config
+from ..core.datasource import DataSource
+from ..core.loader import Digest, get_digest, parse_ups
+from ..core.model import Up
+from ..exception.DataSourceException import DataSourceException
+
+
+class CacheValidators(NamedTuple):
+    """
+    条件请求使用的缓存校验值
+    """
+
+    etag: Optional[str]
+    """响应头 ETag 的值"""
+
+    last_modified: Optional[str]
+    """响应头 Last-Modified 的值"""
+
+
+def get_reload_delay(interval: float, max_backoff: float, failures: int) -> float:
+    """
+    计算距下次检查的等待时间，连续失败时按指数退避并加入随机抖动
+
+    Args:
+        interval: 正常情况下的检查间隔（秒）
+        max_backoff: 退避等待时间上限（秒）
+        failures: 连续失败次数
+
+    Returns:
+        等待时间（秒）
+    """
+    if failures == 0:
+        return interval
+
+    backoff = min(max_backoff, interval * 2 ** failures)
+    return random.uniform(backoff / 2, backoff)
+
+
+class HttpFetcher:
+    """
+    HTTP 推送配置下载器
+    复用同一个长连接，并通过 If-None-Match / If-Modified-Since 发送条件请求，所有方法均为阻塞调用
+    条件请求仅使用通过 commit() 确认的缓存校验值，未能成功应用的推送配置在之后的请求中会被重新下载
+    """
+
+    def __init__(self, url: str, timeout: float, headers: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            url: 推送配置地址，支持 http 与 https
+            timeout: 请求超时时间（秒）
+            headers: 附加请求头。默认：None
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise DataSourceException(f"不支持的推送配置地址: {url}")
+
+        self.__https = parts.scheme == "https"
+        self.__host = parts.hostname
+        self.__port = parts.port
+        self.__path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.__timeout = timeout
+        self.__headers = dict(headers or {})
+        self.__connection: Optional[http.client.HTTPConnection] = None
+        self.__etag: Optional[str] = None
+        self.__last_modified: Optional[str] = None
+
+    def __connect(self) -> http.client.HTTPConnection:
+        """
+        获取长连接，连接不存在时新建
+
+        Returns:
+            HTTP 连接
+        """
+        if self.__connection is None:
+            connection_class = http.client.HTTPSConnection if self.__https else http.client.HTTPConnection
+            self.__connection = connection_class(self.__host, self.__port, timeout=self.__timeout)
+        return self.__connection
+
+    def close(self) -> NoReturn:
+        """
+        关闭长连接
+        """
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def __request(self) -> http.client.HTTPResponse:
+        """
+        发送条件请求，复用的连接已被服务端关闭时自动重连并重试一次
+
+        Returns:
+            HTTP 响应
+        """
+        headers = {"Accept": "application/json", "Accept-Encoding": "gzip", **self.__headers}
+        if self.__etag is not None:
+            headers["If-None-Match"] = self.__etag
+        if self.__last_modified is not None:
+            headers["If-Modified-Since"] = self.__last_modified
+
+        for retry in (True, False):
+            connection = self.__connect()
+            reused = connection.sock is not None
+            try:
+                connection.request("GET", self.__path, headers=headers)
+                return connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if not (retry and reused):
+                    raise
+            except Exception:
+                self.close()
+                raise
+
+    def commit(self, validators: Optional[CacheValidators]) -> NoReturn:
+        """
+        确认推送配置已成功应用，之后的请求使用其缓存校验值发送条件请求
+
+        Args:
+            validators: 已成功应用的推送配置的缓存校验值，为 None 时保持不变
+        """
+        if validators is not None:
+            self.__etag, self.__last_modified = validators
+
+    def fetch(self) -> Tuple[Optional[bytes], Optional[CacheValidators]]:
+        """
+        下载推送配置，缓存校验值需在推送配置成功应用后通过 commit() 确认
+
+        Returns:
+            (推送配置内容, 缓存校验值)，服务端返回 304 Not Modified 时均为 None
+        """
+        response = self.__request()
+        try:
+            data = response.read()
+        except Exception:
+            self.close()
+            raise
+
+        if response.will_close:
+            self.close()
+
+        if response.status == 304:
+            return None, None
+        if response.status != 200:
+            raise DataSourceException(f"下载推送配置失败, HTTP 状态码: {response.status}")
+
+        if response.getheader("Content-Encoding", "").lower() == "gzip":
+            data = gzip.decompress(data)
+
+        return data, CacheValidators(response.getheader("ETag"), response.getheader("Last-Modified"))
+
+    def load(self,
+             last_digest: Optional[Digest] = None) -> Tuple[Optional[Digest], Optional[List[Up]], Optional[CacheValidators]]:
+        """
+        下载、解析并校验推送配置
+
+        Args:
+            last_digest: 上次成功加载的内容摘要，与本次下载的内容摘要一致时跳过解析。默认：None
+
+        Returns:
+            (内容摘要, 主播实例列表, 缓存校验值)，服务端返回 304 Not Modified 时均为 None，
+            内容未发生变化时主播实例列表为 None
+        """
+        data, validators = self.fetch()
+        if data is None:
+            return None, None, None
+
+        digest = get_digest(data)
+        if digest == last_digest:
+            return digest, None, validators
+
+        return digest, parse_ups(data), validators
+
+
+class HttpDataSource(DataSource):
+    """
+    通过 HTTP 下载 JSON 初始化的推送配置数据源
+    定时发送条件请求检查配置是否更新，下载失败时以带随机抖动的指数退避方式延后重试
+    """
+    def __init__(self):
+        super().__init__()
+        self.__digest: Optional[Digest] = None
+        self.__skipped_reloads = 0
+        self.__failures = 0
+        self.__worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="HttpDataSource")
+
+        self.__url = config.get("datasource.http_datasource.url", str, "")
+        self.__headers = config.get("datasource.http_datasource.headers", dict, {})
+        self.__timeout = config.get("datasource.http_datasource.timeout", int, 10)
+        self.__auto_reload = config.get("datasource.http_datasource.auto_reload", bool, True)
+        self.__auto_reload_interval = config.get("datasource.http_datasource.auto_reload_interval", int, 30)
+        self.__max_backoff = config.get("datasource.http_datasource.max_backoff", int, 600)
+
+        self.__fetcher: Optional[HttpFetcher] = None
+        self.__task: Optional[asyncio.Task] = None
+        self.__reload_lock = asyncio.Lock()
+
+    @property
+    def skipped_reloads(self) -> int:
+        """
+        因服务端返回 304 Not Modified 或内容未发生变化而跳过解析的重载次数
+        """
+        return self.__skipped_reloads
+
+    async def __load(self) -> Tuple[Optional[Digest], Optional[List[Up]], Optional[CacheValidators]]:
+        """
+        在下载专用线程中下载、解析并校验推送配置
+
+        Returns:
+            (内容摘要, 主播实例列表, 缓存校验值)
+        """
+        loop = asyncio.get_running_loop()
+        digest, ups, validators = await loop.run_in_executor(self.__worker, self.__fetcher.load, self.__digest)
+        if digest is not None:
+            self.metrics.bytes_read(self.name, digest[0])
+        return digest, ups, validators
+
+    async def load(self) -> NoReturn:
+        """
+        从 HTTP 地址下载 JSON 初始化配置
+        """
+        if self.loaded_ups:
+            return
+
+        logger.info("已选用 HTTP 作为 Bot 数据源")
+        logger.info("开始从 HTTP 中初始化 Bot 配置")
+
+        self.__fetcher = HttpFetcher(self.__url, self.__timeout, self.__headers)
+
+        try:
+            digest, ups, validators = await self.__load()
+        except UnicodeDecodeError:
+            raise DataSourceException("推送配置编码不正确, 请将其转换为 UTF-8 格式编码后重试")
+        except JSONDecodeError:
+            raise DataSourceException("推送配置内容格式不正确")
+        except DataSourceException:
+            raise
+        except Exception as ex:
+            raise DataSourceException(f"下载推送配置异常 {ex}")
+
+        if ups is None:
+            raise DataSourceException("下载推送配置失败, 服务端未返回推送配置内容")
+
+        self.add_many(ups)
+
+        self.__digest = digest
+        self.__fetcher.commit(validators)
+        logger.success(f"成功从 HTTP 中导入了 {len(self.ups)} 个 UP 主")
+
+        if self.__auto_reload:
+            self.__task = executor.create_task(self.__auto_reload_task())
+
+    async def __auto_reload_task(self) -> NoReturn:
+        """
+        定时检查推送配置是否更新并自动重载
+        """
+        while True:
+            await asyncio.sleep(get_reload_delay(self.__auto_reload_interval, self.__max_backoff, self.__failures))
+            if await self.__reload():
+                self.__failures = 0
+            else:
+                self.__failures += 1
+
+    async def reload(self) -> bool:
+        """
+        立即重新下载推送配置并应用配置变化，无需等待下次定时检查
+        与定时检查共用同一把锁，定时检查正在执行时会等待其完成后再重新下载
+
+        Returns:
+            是否成功完成检查
+        """
+        return await self.__reload()
+
+    async def close(self) -> NoReturn:
+        """
+        停止自动重载，关闭长连接并释放下载专用线程
+        """
+        await super().close()
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+        if self.__fetcher is not None:
+            await asyncio.get_running_loop().run_in_executor(self.__worker, self.__fetcher.close)
+        self.__worker.shutdown(wait=False)
+
+    async def __reload(self) -> bool:
+        """
+        重新下载推送配置并应用配置变化，手动重载与定时检查同一时间至多执行一次
+
+        Returns:
+            是否成功完成检查
+        """
+        async with self.__reload_lock:
+            return await self.__reload_config()
+
+    async def __reload_config(self) -> bool:
+        """
+        重新下载推送配置并应用配置变化，调用方需持有重载锁
+
+        Returns:
+            是否成功完成检查
+        """
+        start = time.perf_counter()
+        try:
+            digest, new_ups, validators = await self.__load()
+            if new_ups is None:
+                self.__fetcher.commit(validators)
+                self.__skipped_reloads += 1
+                self.metrics.reload_finished(self.name, "skipped", time.perf_counter() - start)
+                return True
+
+            logger.info(f"数据源配置已更新, 开始重载配置")
+
+            self.reconcile(new_ups)
+
+            # 仅在配置成功应用后确认缓存校验值，否则之后的条件请求会得到 304 而不再重新下载未能应用的配置
+            self.__digest = digest
+            self.__fetcher.commit(validators)
+            self.metrics.reload_finished(self.name, "applied", time.perf_counter() - start)
+            logger.success("数据源配置重载成功")
+            return True
+        except Exception as ex:
+            self.metrics.reload_failed(self.name, ex, time.perf_counter() - start)
+            if isinstance(ex, UnicodeDecodeError):
+                logger.error("数据源推送配置编码不正确, 请将其转换为 UTF-8 格式编码")
+            elif isinstance(ex, JSONDecodeError):
+                logger.error("数据源推送配置内容格式不正确")
+            elif isinstance(ex, DataSourceException):
+                logger.error(ex.msg)
+            else:
+                logger.error(f"数据源自动重载任务异常 {ex}")
+        return False
@@ -0,0 +1,234 @@
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, Hashable, Iterable, List, Mapping, NoReturn, Set, Tuple, Union
+
+from ..core.model import Up, Platform, CAPABILITIES
+
+TargetKey = Tuple[Union[int, str], Platform]
+"""推送目标索引键，(推送目标标识符, 推送平台)"""
+
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+def _platform_keys(up: Up) -> Set[Platform]:
+    return {target.platform for target in up.targets}
+
+
+def _target_keys(up: Up) -> Set[TargetKey]:
+    return {(target.id, target.platform) for target in up.targets}
+
+
+def _feature_keys(up: Up) -> FrozenSet[str]:
+    return up.capabilities.features
+
+
+def _capability_keys(up: Up) -> List[str]:
+    capabilities = up.capabilities
+    return [capability for capability in CAPABILITIES if getattr(capabilities, capability)]
+
+
+class _IndexBuilder:
+    """
+    单个二级索引的可修改工作副本，首次修改某个键时复制该键对应的 UID 集合，之后对此键的修改均在副本上原地进行
+    构建时仅为被修改的键重新创建不可变集合，未修改的键与旧索引共享
+    """
+
+    __slots__ = ("__base", "__keys", "__touched", "__size")
+
+    def __init__(self, base: Mapping[Hashable, FrozenSet[int]], keys: Callable[[Up], Iterable[Hashable]]):
+        """
+        Args:
+            base: 旧索引
+            keys: 获取主播对应索引键的函数
+        """
+        self.__base = base
+        self.__keys = keys
+        self.__touched: Dict[Hashable, Set[int]] = {}
+        self.__size = len(base)
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __uids(self, key: Hashable) -> Set[int]:
+        uids = self.__touched.get(key)
+        if uids is None:
+            uids = self.__touched[key] = set(self.__base.get(key, _EMPTY))
+        return uids
+
+    def add(self, up: Up) -> NoReturn:
+        """
+        将主播加入索引
+
+        Args:
+            up: 主播实例
+        """
+        for key in self.__keys(up):
+            uids = self.__uids(key)
+            if not uids:
+                self.__size += 1
+            uids.add(up.uid)
+
+    def remove(self, up: Up) -> NoReturn:
+        """
+        将主播从索引中移除
+
+        Args:
+            up: 主播实例
+        """
+        for key in self.__keys(up):
+            uids = self.__uids(key)
+            if up.uid in uids:
+                uids.remove(up.uid)
+                if not uids:
+                    self.__size -= 1
+
+    def build(self) -> Mapping[Hashable, FrozenSet[int]]:
+        """
+        构建新索引
+
+        Returns:
+            新索引，未发生修改时返回旧索引
+        """
+        if not self.__touched:
+            return self.__base
+
+        result = dict(self.__base)
+        for key, uids in self.__touched.items():
+            if uids:
+                result[key] = frozenset(uids)
+            else:
+                result.pop(key, None)
+        return MappingProxyType(result)
+
+
+class UpIndexes:
+    """
+    主播二级索引，索引值均为主播 UID 集合
+    与快照一样创建后不再修改，数据源变化时通过 evolve 或 builder 增量构建新的索引
+    """
+
+    __slots__ = ("by_platform", "by_target", "by_feature", "by_capability")
+
+    def __init__(self,
+                 by_platform: Mapping[Platform, FrozenSet[int]] = MappingProxyType({}),
+                 by_target: Mapping[TargetKey, FrozenSet[int]] = MappingProxyType({}),
+                 by_feature: Mapping[str, FrozenSet[int]] = MappingProxyType({}),
+                 by_capability: Mapping[str, FrozenSet[int]] = MappingProxyType({})):
+        self.by_platform = by_platform
+        """推送平台索引"""
+
+        self.by_target = by_target
+        """推送目标索引，键为 (推送目标标识符, 推送平台)"""
+
+        self.by_feature = by_feature
+        """推送功能索引，键为 FEATURES 中的功能名，包含至少有一个推送目标启用了此功能的主播"""
+
+        self.by_capability = by_capability
+        """主播能力索引，键为 CAPABILITIES 中的能力名"""
+
+    def builder(self) -> "UpIndexesBuilder":
+        """
+        创建基于当前索引的可修改工作副本
+
+        Returns:
+            索引工作副本
+        """
+        return UpIndexesBuilder(self)
+
+    def evolve(self, removed: Iterable[Up], added: Iterable[Up]) -> "UpIndexes":
+        """
+        增量构建新索引，更新主播时需将旧实例传入 removed，新实例传入 added
+
+        Args:
+            removed: 需从索引中移除的主播
+            added: 需加入索引的主播
+
+        Returns:
+            新索引
+        """
+        builder = self.builder()
+        for up in removed:
+            builder.remove(up)
+        for up in added:
+            builder.add(up)
+        return builder.build()
+
+    def sizes(self) -> Dict[str, int]:
+        """
+        获取各二级索引的键数量
+
+        Returns:
+            索引名称与键数量的字典
+        """
+        return {
+            "platform": len(self.by_platform),
+            "target": len(self.by_target),
+            "feature": len(self.by_feature),
+            "capability": len(self.by_capability)
+        }
+
+
+class UpIndexesBuilder:
+    """
+    主播二级索引的可修改工作副本，用于在发布新快照前累积多次变更
+    每次变更的开销只与主播自身的索引键数量有关，与数据源中的主播总数无关
+    """
+
+    __slots__ = ("__platform", "__target", "__feature", "__capability")
+
+    def __init__(self, base: UpIndexes):
+        """
+        Args:
+            base: 旧索引
+        """
+        self.__platform = _IndexBuilder(base.by_platform, _platform_keys)
+        self.__target = _IndexBuilder(base.by_target, _target_keys)
+        self.__feature = _IndexBuilder(base.by_feature, _feature_keys)
+        self.__capability = _IndexBuilder(base.by_capability, _capability_keys)
+
+    def add(self, up: Up) -> NoReturn:
+        """
+        将主播加入索引
+
+        Args:
+            up: 主播实例
+        """
+        for index in (self.__platform, self.__target, self.__feature, self.__capability):
+            index.add(up)
+
+    def remove(self, up: Up) -> NoReturn:
+        """
+        将主播从索引中移除
+
+        Args:
+            up: 主播实例
+        """
+        for index in (self.__platform, self.__target, self.__feature, self.__capability):
+            index.remove(up)
+
+    def sizes(self) -> Dict[str, int]:
+        """
+        获取各二级索引当前的键数量
+
+        Returns:
+            索引名称与键数量的字典
+        """
+        return {
+            "platform": len(self.__platform),
+            "target": len(self.__target),
+            "feature": len(self.__feature),
+            "capability": len(self.__capability)
+        }
+
+    def build(self) -> UpIndexes:
+        """
+        构建新索引，构建后不应再继续使用此工作副本
+
+        Returns:
+            新索引
+        """
+        return UpIndexes(
+            self.__platform.build(),
+            self.__target.build(),
+            self.__feature.build(),
+            self.__capability.build()
+        )
@@ -0,0 +1,352 @@
+import codecs
+import hashlib
+import json
+import mmap
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from ..core.model import Up
+from ..exception.DataSourceException import DataSourceException
+
+Digest = Tuple[int, bytes]
+"""文件内容摘要，(文件大小, 文件内容 blake2b 摘要)"""
+
+_UP_LIST_ADAPTER: TypeAdapter[List[Up]] = TypeAdapter(List[Up])
+"""预构建的主播实例列表校验器"""
+
+STREAM_CHUNK_SIZE = 1 << 20
+"""流式读取时每次从文件映射中解码的字节数"""
+
+
+def get_digest(data: bytes) -> Digest:
+    """
+    计算文件内容摘要
+
+    Args:
+        data: 文件内容
+
+    Returns:
+        (文件大小, 文件内容 blake2b 摘要)
+    """
+    return len(data), hashlib.blake2b(data, digest_size=16).digest()
+
+
+def parse_ups(data: bytes) -> List[Up]:
+    """
+    解析 JSON 文件内容并校验为主播实例列表
+    直接使用预构建的 TypeAdapter 从字节串一次性完成解析与校验，不构建中间字典
+
+    Args:
+        data: JSON 文件内容
+
+    Returns:
+        主播实例列表
+    """
+    if data.lstrip()[:1] == b"{":
+        data = b"[" + data + b"]"
+
+    try:
+        return _UP_LIST_ADAPTER.validate_json(data)
+    except ValidationError as ex:
+        errors = ex.errors(include_url=False)
+
+    if any(error["type"] == "json_invalid" for error in errors):
+        json.loads(data.decode("utf-8"))
+        raise DataSourceException("JSON 文件内容格式不正确")
+
+    raise DataSourceException(_format_errors(json.loads(data.decode("utf-8")), errors))
+
+
+def validate_ups(conf: List[Any]) -> List[Up]:
+    """
+    将主播配置字典列表一次性校验为主播实例列表
+
+    Args:
+        conf: 主播配置字典列表
+
+    Returns:
+        主播实例列表
+    """
+    try:
+        return _UP_LIST_ADAPTER.validate_python(conf)
+    except ValidationError as ex:
+        raise DataSourceException(_format_errors(conf, ex.errors(include_url=False)))
+
+
+def _format_errors(conf: Any, errors: List[Dict[str, Any]]) -> str:
+    """
+    将校验错误整理为按主播分组的错误报告
+
+    Args:
+        conf: 被校验的主播配置
+        errors: 校验错误列表
+
+    Returns:
+        错误报告
+    """
+    invalid: Dict[int, List[str]] = {}
+    for error in errors:
+        loc = error["loc"]
+        if not loc:
+            return "JSON 文件内容必须为主播配置数组或单个主播配置对象"
+
+        field = ".".join(map(str, loc[1:]))
+        if error["type"] == "missing":
+            reason = f"缺少必须的 {field} 参数"
+        elif field:
+            reason = f"{field} 参数不合法 ({error['msg']})"
+        else:
+            reason = f"主播配置不合法 ({error['msg']})"
+        invalid.setdefault(loc[0], []).append(reason)
+
+    lines = [f"数据源中存在 {len(invalid)} 个不合法的主播配置:"]
+    for index, reasons in invalid.items():
+        entry = conf[index]
+        uid = entry.get("uid", "未知") if isinstance(entry, dict) else "未知"
+        lines.append(f"第 {index + 1} 个主播 (UID: {uid}): {', '.join(reasons)}")
+    return "\n".join(lines)
+
+
+def load_json_file(path: str,
+                   last_digest: Optional[Digest] = None,
+                   timings: Optional[Dict[str, float]] = None) -> Tuple[Digest, Optional[List[Up]]]:
+    """
+    读取、解析并校验 JSON 配置文件，会在线程池或进程池中执行，以免阻塞事件循环
+
+    Args:
+        path: JSON 文件路径
+        last_digest: 上次成功加载的文件内容摘要，与本次读取的内容摘要一致时跳过解析。默认：None
+        timings: 用于记录各阶段耗时的字典，解析与校验在同一次调用中完成，耗时计入 validate 阶段。默认：None
+
+    Returns:
+        (文件内容摘要, 主播实例列表)，文件内容未发生变化时主播实例列表为 None
+    """
+    start = time.perf_counter()
+    with open(path, "rb") as file:
+        data = file.read()
+
+    digest = get_digest(data)
+    read = time.perf_counter()
+    if timings is not None:
+        timings["read"] = read - start
+    if digest == last_digest:
+        return digest, None
+
+    ups = parse_ups(data)
+    if timings is not None:
+        timings["validate"] = time.perf_counter() - read
+    return digest, ups
+
+
+def load_timed(load: Callable[..., Tuple[Digest, Optional[List[Up]]]],
+               path: str,
+               last_digest: Optional[Digest] = None) -> Tuple[Digest, Optional[List[Up]], Dict[str, float]]:
+    """
+    调用 load_json_file() 或 stream_json_file() 并同时返回各阶段耗时，可在进程池中执行
+
+    Args:
+        load: load_json_file 或 stream_json_file
+        path: JSON 文件路径
+        last_digest: 上次成功加载的文件内容摘要。默认：None
+
+    Returns:
+        (文件内容摘要, 主播实例列表, 阶段名称与耗时的字典)
+    """
+    timings: Dict[str, float] = {}
+    digest, ups = load(path, last_digest, timings)
+    return digest, ups, timings
+
+
+def _release(buffer: mmap.mmap, start: int, end: int) -> int:
+    """
+    通知系统丢弃文件映射中已处理完毕的内存页，以降低流式读取时的常驻内存
+
+    Args:
+        buffer: 文件映射
+        start: 上次丢弃到的位置
+        end: 已处理完毕的位置
+
+    Returns:
+        本次丢弃到的位置，按内存页对齐
+    """
+    end -= end % mmap.PAGESIZE
+    if end > start and hasattr(mmap, "MADV_DONTNEED"):
+        buffer.madvise(mmap.MADV_DONTNEED, start, end - start)
+        return end
+    return start
+
+
+def _iter_entries(buffer: mmap.mmap) -> Iterator[Any]:
+    """
+    从文件映射中逐个解析顶层数组的元素，每次只解码一小段内容，已解析的内容会被及时释放
+    顶层为单个对象时将其视为只含有一个元素的数组
+
+    Args:
+        buffer: 文件映射
+
+    Returns:
+        顶层数组元素的迭代器
+    """
+    size = len(buffer)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    scanner = json.JSONDecoder()
+    text = ""
+    position = 0
+    offset = 0
+    released = 0
+
+    def more() -> bool:
+        nonlocal text, position, offset, released
+        if offset >= size:
+            return False
+        chunk = buffer[offset:offset + STREAM_CHUNK_SIZE]
+        offset += len(chunk)
+        text = text[position:] + decoder.decode(chunk, final=offset >= size)
+        position = 0
+        released = _release(buffer, released, offset)
+        return True
+
+    def peek() -> str:
+        nonlocal position
+        while True:
+            while position < len(text) and text[position] in " \t\n\r":
+                position += 1
+            if position < len(text):
+                return text[position]
+            if not more():
+                return ""
+
+    def value() -> Any:
+        nonlocal position
+        while True:
+            try:
+                entry, end = scanner.raw_decode(text, position)
+                if end < len(text) or offset >= size:
+                    position = end
+                    return entry
+            except json.JSONDecodeError:
+                if offset >= size:
+                    raise
+            more()
+
+    first = peek()
+    if first != "[":
+        if first != "{":
+            value()
+            raise DataSourceException("JSON 文件内容必须为主播配置数组或单个主播配置对象")
+        yield value()
+        if peek():
+            raise json.JSONDecodeError("Extra data", text, position)
+        return
+
+    position += 1
+    if peek() == "]":
+        position += 1
+    else:
+        while True:
+            yield value()
+            separator = peek()
+            position += 1
+            if separator == "]":
+                break
+            if separator != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, position - 1)
+            peek()
+
+    if peek():
+        raise json.JSONDecodeError("Extra data", text, position)
+
+
+def iter_ups(path: str, timings: Optional[Dict[str, float]] = None) -> Iterator[Up]:
+    """
+    通过文件映射流式读取 JSON 配置文件，逐个解析并校验主播配置，校验通过的主播实例会立即产出
+    全部主播读取完毕后，若存在不合法的主播配置，则抛出包含全部不合法配置的异常
+
+    Args:
+        path: JSON 文件路径
+        timings: 用于累加解析 (parse) 与校验 (validate) 阶段耗时的字典。默认：None
+
+    Returns:
+        主播实例的迭代器
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise json.JSONDecodeError("Expecting value", "", 0)
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                buffer.madvise(mmap.MADV_SEQUENTIAL)
+
+            invalid: Dict[int, Any] = {}
+            errors: List[Dict[str, Any]] = []
+            parse = validate = 0.0
+            entries = enumerate(_iter_entries(buffer))
+            while True:
+                start = time.perf_counter()
+                index, entry = next(entries, (None, None))
+                parsed = time.perf_counter()
+                parse += parsed - start
+                if index is None:
+                    break
+
+                try:
+                    up = Up.model_validate(entry)
+                except ValidationError as ex:
+                    invalid[index] = entry
+                    errors.extend({**error, "loc": (index, *error["loc"])} for error in ex.errors(include_url=False))
+                    continue
+                finally:
+                    validate += time.perf_counter() - parsed
+
+                yield up
+
+            if timings is not None:
+                timings["parse"] = timings.get("parse", 0.0) + parse
+                timings["validate"] = timings.get("validate", 0.0) + validate
+
+    if errors:
+        raise DataSourceException(_format_errors(invalid, errors))
+
+
+def get_file_digest(path: str) -> Digest:
+    """
+    通过文件映射计算文件内容摘要，不将文件内容复制到内存中
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        (文件大小, 文件内容 blake2b 摘要)
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return get_digest(b"")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return get_digest(buffer)
+
+
+def stream_json_file(path: str,
+                     last_digest: Optional[Digest] = None,
+                     timings: Optional[Dict[str, float]] = None) -> Tuple[Digest, Optional[List[Up]]]:
+    """
+    以流式读取方式读取、解析并校验 JSON 配置文件，返回值与 load_json_file() 相同，但不会同时持有整个文件内容
+
+    Args:
+        path: JSON 文件路径
+        last_digest: 上次成功加载的文件内容摘要，与本次读取的内容摘要一致时跳过解析。默认：None
+        timings: 用于记录各阶段耗时的字典，读取阶段仅包含计算文件内容摘要的耗时。默认：None
+
+    Returns:
+        (文件内容摘要, 主播实例列表)，文件内容未发生变化时主播实例列表为 None
+    """
+    start = time.perf_counter()
+    digest = get_file_digest(path)
+    if timings is not None:
+        timings["read"] = time.perf_counter() - start
+    if digest == last_digest:
+        return digest, None
+
+    return digest, list(iter_ups(path, timings))
@@ -0,0 +1,284 @@
+import abc
+import threading
+from typing import Dict, FrozenSet, NoReturn, Tuple
+
+STAGES = ("read", "parse", "validate", "diff", "apply")
+"""重载各阶段名称，JSON 解析与校验在同一次调用中完成时，耗时全部计入 validate 阶段"""
+
+CHANGES = ("added", "removed", "updated", "skipped")
+"""主播变化类型，skipped 为重新读取后比较发现配置未发生变化的主播"""
+
+Labels = FrozenSet[Tuple[str, str]]
+"""指标标签"""
+
+
+class MetricsHook(metaclass=abc.ABCMeta):
+    """
+    数据源指标钩子基类，实现 increment、observe、gauge 三个基础方法即可接入其他监控系统
+    其余方法为数据源使用的便捷方法，会转换为基础方法调用，指标名称与 Prometheus 命名规范一致
+    """
+
+    @abc.abstractmethod
+    def increment(self, name: str, value: float = 1, **labels: str) -> NoReturn:
+        """
+        累加计数器
+
+        Args:
+            name: 指标名称
+            value: 增量。默认：1
+            labels: 指标标签
+        """
+        pass
+
+    @abc.abstractmethod
+    def observe(self, name: str, value: float, **labels: str) -> NoReturn:
+        """
+        记录一次观测值，如耗时
+
+        Args:
+            name: 指标名称
+            value: 观测值
+            labels: 指标标签
+        """
+        pass
+
+    @abc.abstractmethod
+    def gauge(self, name: str, value: float, **labels: str) -> NoReturn:
+        """
+        设置仪表盘当前值
+
+        Args:
+            name: 指标名称
+            value: 当前值
+            labels: 指标标签
+        """
+        pass
+
+    def stage(self, source: str, stage: str, seconds: float) -> NoReturn:
+        """
+        记录重载阶段耗时
+
+        Args:
+            source: 数据源名称
+            stage: 阶段名称，见 STAGES
+            seconds: 耗时（秒）
+        """
+        self.observe("datasource_stage_seconds", seconds, source=source, stage=stage)
+
+    def bytes_read(self, source: str, count: int) -> NoReturn:
+        """
+        记录读取的配置字节数
+
+        Args:
+            source: 数据源名称
+            count: 字节数
+        """
+        self.increment("datasource_bytes_read_total", count, source=source)
+
+    def ups_changed(self, source: str, change: str, count: int) -> NoReturn:
+        """
+        记录发生变化的主播数量
+
+        Args:
+            source: 数据源名称
+            change: 变化类型，见 CHANGES
+            count: 主播数量
+        """
+        if count:
+            self.increment("datasource_ups_changed_total", count, source=source, change=change)
+
+    def events_dispatched(self, source: str, event: str, count: int = 1) -> NoReturn:
+        """
+        记录发出的事件数量
+
+        Args:
+            source: 数据源名称
+            event: 事件类型
+            count: 事件数量。默认：1
+        """
+        if count:
+            self.increment("datasource_events_dispatched_total", count, source=source, event=event)
+
+    def events_coalesced(self, source: str, count: int = 1) -> NoReturn:
+        """
+        记录在发出队列中被合并的事件数量
+
+        Args:
+            source: 数据源名称
+            count: 事件数量。默认：1
+        """
+        self.increment("datasource_events_coalesced_total", count, source=source)
+
+    def queue_depth(self, source: str, depth: int) -> NoReturn:
+        """
+        记录发出队列中等待发出的事件数量
+
+        Args:
+            source: 数据源名称
+            depth: 事件数量
+        """
+        self.gauge("datasource_dispatch_queue_depth", depth, source=source)
+
+    def reload_finished(self, source: str, result: str, seconds: float) -> NoReturn:
+        """
+        记录一次重载的结果与总耗时
+
+        Args:
+            source: 数据源名称
+            result: 重载结果，可选值：applied，skipped，failed
+            seconds: 总耗时（秒）
+        """
+        self.increment("datasource_reloads_total", source=source, result=result)
+        self.observe("datasource_reload_seconds", seconds, source=source)
+
+    def reload_failed(self, source: str, exception: BaseException, seconds: float) -> NoReturn:
+        """
+        记录一次失败的重载
+
+        Args:
+            source: 数据源名称
+            exception: 导致重载失败的异常
+            seconds: 总耗时（秒）
+        """
+        self.increment("datasource_reload_failures_total", source=source, exception=type(exception).__name__)
+        self.reload_finished(source, "failed", seconds)
+
+    def sizes(self, source: str, ups: int, indexes: Dict[str, int]) -> NoReturn:
+        """
+        记录数据源当前的主播数量与各二级索引的键数量
+
+        Args:
+            source: 数据源名称
+            ups: 主播数量
+            indexes: 索引名称与键数量的字典
+        """
+        self.gauge("datasource_ups", ups, source=source)
+        for index, size in indexes.items():
+            self.gauge("datasource_index_size", size, source=source, index=index)
+
+
+class NullMetrics(MetricsHook):
+    """
+    不记录任何指标的空实现，数据源未设置指标钩子时使用
+    """
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> NoReturn:
+        pass
+
+    def observe(self, name: str, value: float, **labels: str) -> NoReturn:
+        pass
+
+    def gauge(self, name: str, value: float, **labels: str) -> NoReturn:
+        pass
+
+
+class InMemoryMetrics(MetricsHook):
+    """
+    将指标保存在内存中的实现，可通过 snapshot() 获取全部指标的当前值，线程安全
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__counters: Dict[str, Dict[Labels, float]] = {}
+        self.__observations: Dict[str, Dict[Labels, Tuple[int, float, float]]] = {}
+        self.__gauges: Dict[str, Dict[Labels, float]] = {}
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> NoReturn:
+        key = frozenset(labels.items())
+        with self.__lock:
+            series = self.__counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> NoReturn:
+        key = frozenset(labels.items())
+        with self.__lock:
+            series = self.__observations.setdefault(name, {})
+            count, total, maximum = series.get(key, (0, 0.0, 0.0))
+            series[key] = (count + 1, total + value, max(maximum, value))
+
+    def gauge(self, name: str, value: float, **labels: str) -> NoReturn:
+        key = frozenset(labels.items())
+        with self.__lock:
+            self.__gauges.setdefault(name, {})[key] = value
+
+    def get(self, name: str, **labels: str) -> float:
+        """
+        获取计数器或仪表盘的当前值，观测值返回观测次数
+
+        Args:
+            name: 指标名称
+            labels: 指标标签
+
+        Returns:
+            指标当前值，指标不存在时返回 0
+        """
+        key = frozenset(labels.items())
+        with self.__lock:
+            if name in self.__observations:
+                return self.__observations[name].get(key, (0, 0.0, 0.0))[0]
+            return self.__counters.get(name, self.__gauges.get(name, {})).get(key, 0)
+
+    def snapshot(self) -> Dict[str, Dict[str, list]]:
+        """
+        获取全部指标的当前值
+
+        Returns:
+            按 counters、observations、gauges 分类的指标字典，每个指标为 {"labels": 标签, "value": 值} 的列表，
+            观测值的值为 {"count": 次数, "sum": 总和, "max": 最大值}
+        """
+        def dump(metrics, convert):
+            return {
+                name: [{"labels": dict(key), "value": convert(value)} for key, value in series.items()]
+                for name, series in metrics.items()
+            }
+
+        with self.__lock:
+            return {
+                "counters": dump(self.__counters, lambda value: value),
+                "observations": dump(
+                    self.__observations, lambda value: {"count": value[0], "sum": value[1], "max": value[2]}
+                ),
+                "gauges": dump(self.__gauges, lambda value: value)
+            }
+
+
+class PrometheusMetrics(InMemoryMetrics):
+    """
+    以 Prometheus 文本格式输出指标的实现，可将 render() 的结果作为 /metrics 接口的响应内容
+    观测值以 summary 类型输出 _count 与 _sum，并额外输出 _max 仪表盘
+    """
+
+    @staticmethod
+    def __format_labels(labels: Dict[str, str]) -> str:
+        if not labels:
+            return ""
+        pairs = ",".join(
+            '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for name, value in sorted(labels.items())
+        )
+        return f"{{{pairs}}}"
+
+    def render(self) -> str:
+        """
+        以 Prometheus 文本格式输出全部指标
+
+        Returns:
+            Prometheus 文本格式的指标
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in sorted(snapshot["counters"].items()):
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{name}{self.__format_labels(item['labels'])} {item['value']}" for item in series)
+        for name, series in sorted(snapshot["observations"].items()):
+            lines.append(f"# TYPE {name} summary")
+            for item in series:
+                labels = self.__format_labels(item["labels"])
+                lines.append(f"{name}_count{labels} {item['value']['count']}")
+                lines.append(f"{name}_sum{labels} {item['value']['sum']}")
+            lines.append(f"# TYPE {name}_max gauge")
+            lines.extend(f"{name}_max{self.__format_labels(item['labels'])} {item['value']['max']}" for item in series)
+        for name, series in sorted(snapshot["gauges"].items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f"{name}{self.__format_labels(item['labels'])} {item['value']}" for item in series)
+        return "\n".join(lines) + "\n"
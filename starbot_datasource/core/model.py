@@ -1,15 +1,98 @@
-from typing import Optional, List, Union
+import threading
+from typing import Optional, List, Union, FrozenSet, NoReturn, ClassVar, Dict, Tuple, TypeVar
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr, model_validator
 
+from ..core.template import MessageTemplate, compile_template, LIVE_ON_FIELDS, LIVE_OFF_FIELDS, DYNAMIC_UPDATE_FIELDS
 
-class LiveOn(BaseModel):
+FEATURES = ("live_on", "live_off", "live_report", "dynamic_update")
+"""推送功能"""
+
+CAPABILITIES = ("need_connect", "need_dynamic", "need_report")
+"""主播所需的能力"""
+
+REPORT_SECTIONS = (
+    "time", "fans_change", "fans_medal_change", "guard_change", "danmu", "box", "gift", "sc", "guard",
+    "danmu_ranking", "box_ranking", "box_profit_ranking", "gift_ranking", "sc_ranking", "guard_list",
+    "box_profit_diagram", "danmu_diagram", "box_diagram", "gift_diagram", "sc_diagram", "guard_diagram", "danmu_cloud"
+)
+"""直播报告中可开启的内容板块"""
+
+_INTERN_POOL_LIMIT = 65536
+"""共享实例池容量上限，超出后清空重建，避免长期运行时不断累积已不再使用的配置"""
+
+_intern_pool: Dict[Tuple, BaseModel] = {}
+_intern_pool_lock = threading.Lock()
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def intern_model(model: M) -> M:
+    """
+    获取与给定实例内容相同的共享实例，仅可用于字段均为不可变值的冻结模型
+
+    Args:
+        model: 冻结模型实例
+
+    Returns:
+        内容相同的共享实例，池中不存在时将给定实例放入池中并返回
+    """
+    key = (type(model), tuple(model.__dict__.values()))
+    shared = _intern_pool.get(key)
+    if shared is not None:
+        return shared
+
+    with _intern_pool_lock:
+        if len(_intern_pool) >= _INTERN_POOL_LIMIT:
+            _intern_pool.clear()
+        return _intern_pool.setdefault(key, model)
+
+
+class MessageConfig(BaseModel):
+    """
+    含推送内容模板的推送配置基类，推送内容模板在校验时预编译，模板语法错误会作为校验错误报告
+    实例不可修改，以便内容相同的配置在多个推送目标间共享
+    """
+    model_config = ConfigDict(frozen=True)
+
+    template_fields: ClassVar[FrozenSet[str]] = frozenset()
+    """推送内容模板中允许使用的专用占位符"""
+
+    message: str = ""
+    """
+    推送内容模板。默认：""
+    """
+
+    _template: Optional[MessageTemplate] = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def compile_message(self) -> "MessageConfig":
+        """
+        校验完成后预编译推送内容模板
+        """
+        self._template = compile_template(self.message, self.template_fields)
+        return self
+
+    @property
+    def template(self) -> MessageTemplate:
+        """
+        预编译的推送内容模板
+        """
+        template = self.__pydantic_private__["_template"]
+        if template is None or template.source != self.message:
+            template = self._template = compile_template(self.message, self.template_fields)
+        return template
+
+
+class LiveOn(MessageConfig):
     """
     开播推送配置
     可使用构造方法手动传入所需的各项配置
     或使用 LiveOn.default() 获取功能全部开启的默认配置
     """
 
+    template_fields: ClassVar[FrozenSet[str]] = LIVE_ON_FIELDS
+
     enabled: bool = False
     """是否启用开播推送。默认：False"""
 
@@ -31,13 +114,15 @@ class LiveOn(BaseModel):
         return LiveOn(enabled=True, message="{uname} 正在直播 {title}\n{url}{next}{cover}")
 
 
-class LiveOff(BaseModel):
+class LiveOff(MessageConfig):
     """
     下播推送配置
     可使用构造方法手动传入所需的各项配置
     或使用 LiveOff.default() 获取功能全部开启的默认配置
     """
 
+    template_fields: ClassVar[FrozenSet[str]] = LIVE_OFF_FIELDS
+
     enabled: bool = False
     """是否启用下播推送。默认：False"""
 
@@ -64,7 +149,9 @@ class LiveReport(BaseModel):
     直播报告配置，直播报告会在下播推送后发出，下播推送是否开启不会影响直播报告的推送
     可使用构造方法手动传入所需的各项配置
     或使用 LiveReport.default() 获取功能全部开启的默认配置
+    实例不可修改，以便内容相同的配置在多个推送目标间共享
     """
+    model_config = ConfigDict(frozen=True)
 
     enabled: bool = False
     """是否启用直播报告。默认：False"""
@@ -163,13 +250,15 @@ class LiveReport(BaseModel):
                           danmu_cloud=True)
 
 
-class DynamicUpdate(BaseModel):
+class DynamicUpdate(MessageConfig):
     """
     动态推送配置
     可使用构造方法手动传入所需的各项配置
     或使用 DynamicUpdate.default() 获取功能全部开启的默认配置
     """
 
+    template_fields: ClassVar[FrozenSet[str]] = DYNAMIC_UPDATE_FIELDS
+
     enabled: bool = False
     """是否启用动态推送。默认：False"""
 
@@ -195,7 +284,10 @@ class DynamicUpdate(BaseModel):
 class Platform(BaseModel):
     """
     推送平台类
+    实例不可修改，以便相同的推送平台在多个推送目标间共享
     """
+    model_config = ConfigDict(frozen=True)
+
     name: str
     """推送平台唯一标识符，请使用 平台名称/自定义名称(建议使用推送平台实现所在的代码仓库名) 的格式，并注意唯一性，例：QQ/StarBot"""
 
@@ -234,6 +326,16 @@ class PushTarget(BaseModel):
     dynamic_update: DynamicUpdate = DynamicUpdate()
     """动态推送配置。默认：DynamicUpdate()"""
 
+    @model_validator(mode="after")
+    def intern_configs(self) -> "PushTarget":
+        """
+        校验完成后将推送平台与各项推送配置替换为内容相同的共享实例
+        """
+        fields = self.__dict__
+        for name in ("platform", "live_on", "live_off", "live_report", "dynamic_update"):
+            fields[name] = intern_model(fields[name])
+        return self
+
     def __eq__(self, other):
         if isinstance(other, PushTarget):
             return self.id == other.id and self.platform == other.platform
@@ -243,9 +345,85 @@ class PushTarget(BaseModel):
         return hash(self.id) ^ hash(self.platform)
 
 
+class UpChangeSet(BaseModel):
+    """
+    主播配置变更集，描述同一主播新旧配置之间推送目标的差异
+    """
+
+    uid: int
+    """主播 UID"""
+
+    added: List[PushTarget] = []
+    """新增的推送目标"""
+
+    removed: List[PushTarget] = []
+    """移除的推送目标"""
+
+    modified: List[PushTarget] = []
+    """配置发生变化的推送目标（新配置）"""
+
+    def is_empty(self) -> bool:
+        """
+        变更集中是否不含任何推送目标变化，仅推送目标顺序发生变化时变更集为空
+
+        Returns:
+            变更集是否为空
+        """
+        return not (self.added or self.removed or self.modified)
+
+
+class UpCapabilities(BaseModel):
+    """
+    主播能力概要，汇总主播全部推送目标的推送功能开关
+    """
+    model_config = ConfigDict(frozen=True)
+
+    features: FrozenSet[str] = frozenset()
+    """至少有一个推送目标启用的推送功能"""
+
+    need_connect: bool = False
+    """是否需要连接直播间，启用了开播推送、下播推送或直播报告时需要"""
+
+    need_dynamic: bool = False
+    """是否需要轮询动态，启用了动态推送时需要"""
+
+    need_report: bool = False
+    """是否需要收集直播报告数据，启用了直播报告时需要"""
+
+    report_sections: FrozenSet[str] = frozenset()
+    """启用直播报告的推送目标中，至少有一个开启的直播报告内容板块"""
+
+    @classmethod
+    def of(cls, targets: List[PushTarget]) -> "UpCapabilities":
+        """
+        根据推送目标计算能力概要
+
+        Args:
+            targets: 推送目标
+
+        Returns:
+            能力概要
+        """
+        features = frozenset(
+            feature for feature in FEATURES if any(getattr(target, feature).enabled for target in targets)
+        )
+        report_sections = frozenset(
+            section for section in REPORT_SECTIONS
+            if any(target.live_report.enabled and getattr(target.live_report, section) for target in targets)
+        )
+        return UpCapabilities(
+            features=features,
+            need_connect=bool(features & {"live_on", "live_off", "live_report"}),
+            need_dynamic="dynamic_update" in features,
+            need_report="live_report" in features,
+            report_sections=report_sections
+        )
+
+
 class Up(BaseModel):
     """
     主播类
+    主播能力概要在校验时计算一次并缓存，校验后直接修改推送目标时需调用 refresh_capabilities() 重新计算
     """
 
     uid: int
@@ -254,6 +432,59 @@ class Up(BaseModel):
     targets: List[PushTarget]
     """主播所需推送的推送目标"""
 
+    _changeset: Optional[UpChangeSet] = PrivateAttr(default=None)
+
+    _capabilities: Optional[UpCapabilities] = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def compute_capabilities(self) -> "Up":
+        """
+        校验完成后计算主播能力概要
+        """
+        self._capabilities = UpCapabilities.of(self.targets)
+        return self
+
+    @property
+    def capabilities(self) -> UpCapabilities:
+        """
+        主播能力概要
+        """
+        # 直接读取私有属性字典，绕过 pydantic 较慢的 __getattr__，此属性会在扫描全部主播时被频繁读取
+        capabilities = self.__pydantic_private__["_capabilities"]
+        if capabilities is None:
+            capabilities = self._capabilities = UpCapabilities.of(self.targets)
+        return capabilities
+
+    def refresh_capabilities(self) -> NoReturn:
+        """
+        重新计算主播能力概要
+        """
+        self._capabilities = UpCapabilities.of(self.targets)
+
+    @property
+    def changeset(self) -> Optional[UpChangeSet]:
+        """
+        本主播实例相对于旧配置的变更集，仅 DataSourceUpdated 事件与 DataSourceBatchChanged 事件中更新的主播携带，
+        数据源中保存的主播实例始终为 None
+        """
+        return self.__pydantic_private__["_changeset"]
+
+    def with_changeset(self, changeset: Optional[UpChangeSet]) -> "Up":
+        """
+        获取携带指定变更集的浅拷贝，用于在事件中传递变更集而不修改数据源中共享的主播实例
+
+        Args:
+            changeset: 变更集，为 None 时获取不携带变更集的实例
+
+        Returns:
+            携带指定变更集的主播实例，变更集与本实例相同时返回本实例
+        """
+        if self.__pydantic_private__["_changeset"] is changeset:
+            return self
+        up = self.model_copy()
+        up.__pydantic_private__["_changeset"] = changeset
+        return up
+
     def __eq__(self, other):
         if isinstance(other, Up):
             return self.uid == other.uid
@@ -269,8 +500,28 @@ class Up(BaseModel):
         Returns:
             是否需要连接直播间
         """
-        return any([
-            any(map(lambda conf: conf.enabled, map(lambda group: group.live_on, self.targets))),
-            any(map(lambda conf: conf.enabled, map(lambda group: group.live_off, self.targets))),
-            any(map(lambda conf: conf.enabled, map(lambda group: group.live_report, self.targets)))
-        ])
+        return self.capabilities.need_connect
+
+
+class DataSourceChangeSet(BaseModel):
+    """
+    数据源批量变更集，随 DataSourceBatchChanged 事件一同发出
+    """
+
+    added: List[Up] = []
+    """新增的主播"""
+
+    removed: List[Up] = []
+    """移除的主播"""
+
+    updated: List[Up] = []
+    """更新的主播（新配置），可通过 Up.changeset 获取各主播的变更集"""
+
+    def is_empty(self) -> bool:
+        """
+        变更集中是否不含任何主播变化
+
+        Returns:
+            变更集是否为空
+        """
+        return not (self.added or self.removed or self.updated)
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Awaitable, Callable, NoReturn, Optional
+
+from starbot_executor import executor
+
+
+class ReloadScheduler:
+    """
+    配置重载调度器
+    合并静默期内连续到达的变化通知，并保证同一时间至多执行一次重载
+    重载执行期间到达的变化通知会被合并为重载结束后的一次后续重载
+    """
+
+    def __init__(self, reload: Callable[[], Awaitable], quiet_window: float):
+        """
+        Args:
+            reload: 执行重载的异步函数
+            quiet_window: 静默期时长（秒），最后一次变化通知后经过此时长仍无新通知时才开始重载
+        """
+        self.__reload = reload
+        self.__quiet_window = quiet_window
+        self.__changed = asyncio.Event()
+        self.__task: Optional[asyncio.Task] = None
+
+    def notify(self) -> NoReturn:
+        """
+        通知调度器配置发生了变化，首次调用时启动调度任务
+        """
+        self.__changed.set()
+        if self.__task is None:
+            self.__task = executor.create_task(self.__run())
+
+    def close(self) -> NoReturn:
+        """
+        停止调度任务
+        """
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+
+    async def __run(self) -> NoReturn:
+        """
+        调度任务，等待变化通知进入静默期后执行重载
+        """
+        while True:
+            await self.__changed.wait()
+
+            while True:
+                self.__changed.clear()
+                try:
+                    await asyncio.wait_for(self.__changed.wait(), self.__quiet_window)
+                except asyncio.TimeoutError:
+                    break
+
+            await self.__reload()
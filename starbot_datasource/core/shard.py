@@ -0,0 +1,62 @@
+import hashlib
+from bisect import bisect_right
+from typing import List
+
+from ..exception.DataSourceException import DataSourceException
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    基于主播 UID 的一致性哈希环，用于将主播分配到多个 Bot 实例
+    每个分片在环上拥有多个虚拟节点，分片数量变化时只有约 1/N 的主播会改变所属分片
+    """
+
+    __slots__ = ("__count", "__virtual_nodes", "__points", "__owners")
+
+    def __init__(self, count: int, virtual_nodes: int = 160):
+        """
+        Args:
+            count: 分片数量
+            virtual_nodes: 每个分片的虚拟节点数量，越多分配越均匀。默认：160
+        """
+        if count < 1:
+            raise DataSourceException(f"分片数量必须大于 0, 当前值: {count}")
+        if virtual_nodes < 1:
+            raise DataSourceException(f"虚拟节点数量必须大于 0, 当前值: {virtual_nodes}")
+
+        nodes = sorted((_hash(f"shard-{shard}#{node}"), shard) for shard in range(count) for node in range(virtual_nodes))
+        self.__count = count
+        self.__virtual_nodes = virtual_nodes
+        self.__points: List[int] = [point for point, _ in nodes]
+        self.__owners: List[int] = [shard for _, shard in nodes]
+
+    @property
+    def count(self) -> int:
+        """
+        分片数量
+        """
+        return self.__count
+
+    @property
+    def virtual_nodes(self) -> int:
+        """
+        每个分片的虚拟节点数量
+        """
+        return self.__virtual_nodes
+
+    def shard_of(self, uid: int) -> int:
+        """
+        获取主播所属的分片
+
+        Args:
+            uid: 主播 UID
+
+        Returns:
+            分片序号，从 0 开始
+        """
+        position = bisect_right(self.__points, _hash(str(uid)))
+        return self.__owners[position % len(self.__owners)]
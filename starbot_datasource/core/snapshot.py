@@ -0,0 +1,180 @@
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterator, Mapping, Optional
+
+from ..core.index import UpIndexes, UpIndexesBuilder
+from ..core.model import Up
+
+
+class DataSourceSnapshot:
+    """
+    数据源只读快照
+    快照创建后不会再被修改，数据源发生变化时会在旁路构建新的快照，并通过一次引用替换发布
+    读取方持有快照期间可无锁地进行一致的遍历，并可通过 generation 判断数据源是否已发生变化
+    """
+
+    __slots__ = ("__generation", "__up_map", "__indexes", "__ups", "__uids")
+
+    def __init__(self, up_map: Dict[int, Up], generation: int = 0, indexes: Optional[UpIndexes] = None):
+        """
+        Args:
+            up_map: 主播 UID 与主播实例的映射，快照会接管此字典，调用方之后不可再修改
+            generation: 快照版本号。默认：0
+            indexes: 与主播映射对应的二级索引，为 None 时根据主播映射完整构建。默认：None
+        """
+        self.__generation = generation
+        self.__up_map: Mapping[int, Up] = MappingProxyType(up_map)
+        self.__indexes = indexes if indexes is not None else UpIndexes().evolve((), up_map.values())
+        self.__ups: Optional[FrozenSet[Up]] = None
+        self.__uids: Optional[FrozenSet[int]] = None
+
+    @property
+    def generation(self) -> int:
+        """
+        快照版本号，数据源每发布一次新快照递增 1
+        """
+        return self.__generation
+
+    @property
+    def up_map(self) -> Mapping[int, Up]:
+        """
+        主播 UID 与主播实例的只读映射
+        """
+        return self.__up_map
+
+    @property
+    def indexes(self) -> UpIndexes:
+        """
+        主播二级索引
+        """
+        return self.__indexes
+
+    @property
+    def ups(self) -> FrozenSet[Up]:
+        """
+        全部主播实例，首次访问时构建
+        """
+        if self.__ups is None:
+            self.__ups = frozenset(self.__up_map.values())
+        return self.__ups
+
+    @property
+    def uids(self) -> FrozenSet[int]:
+        """
+        全部主播 UID，首次访问时构建
+        """
+        if self.__uids is None:
+            self.__uids = frozenset(self.__up_map.keys())
+        return self.__uids
+
+    def __getitem__(self, uid: int) -> Up:
+        return self.__up_map[uid]
+
+    def __contains__(self, uid: int) -> bool:
+        return uid in self.__up_map
+
+    def __iter__(self) -> Iterator[Up]:
+        return iter(self.__up_map.values())
+
+    def __len__(self) -> int:
+        return len(self.__up_map)
+
+    def get(self, uid: int) -> Optional[Up]:
+        """
+        获取主播实例
+
+        Args:
+            uid: 主播 UID
+
+        Returns:
+            主播实例，不存在时返回 None
+        """
+        return self.__up_map.get(uid)
+
+    def mutable_copy(self) -> Dict[int, Up]:
+        """
+        获取主播映射的可修改副本，用于构建下一个快照
+
+        Returns:
+            主播 UID 与主播实例的映射副本
+        """
+        return dict(self.__up_map)
+
+
+class SnapshotBuilder:
+    """
+    快照的可修改工作副本，用于在发布新快照前累积多次变更
+    主播映射在创建时复制一次，二级索引仅复制被修改的键，之后的每次变更开销与主播总数无关
+    构建出的快照会接管工作副本中的主播映射，构建后不应再继续使用此工作副本
+    """
+
+    __slots__ = ("__up_map", "__indexes", "generation")
+
+    def __init__(self, base: DataSourceSnapshot):
+        """
+        Args:
+            base: 作为起点的快照
+        """
+        self.__up_map: Dict[int, Up] = base.mutable_copy()
+        self.__indexes: UpIndexesBuilder = base.indexes.builder()
+        self.generation = base.generation
+        """构建出的快照的版本号"""
+
+    @property
+    def up_map(self) -> Mapping[int, Up]:
+        """
+        当前主播映射，调用方不可修改
+        """
+        return self.__up_map
+
+    @property
+    def indexes(self) -> UpIndexesBuilder:
+        """
+        二级索引工作副本
+        """
+        return self.__indexes
+
+    def __contains__(self, uid: int) -> bool:
+        return uid in self.__up_map
+
+    def __len__(self) -> int:
+        return len(self.__up_map)
+
+    def put(self, up: Up) -> Optional[Up]:
+        """
+        添加或替换主播
+
+        Args:
+            up: 主播实例
+
+        Returns:
+            被替换的旧主播实例，主播原本不存在时返回 None
+        """
+        old = self.__up_map.get(up.uid)
+        if old is not None:
+            self.__indexes.remove(old)
+        self.__up_map[up.uid] = up
+        self.__indexes.add(up)
+        return old
+
+    def pop(self, uid: int) -> Up:
+        """
+        移除主播
+
+        Args:
+            uid: 主播 UID
+
+        Returns:
+            被移除的主播实例
+        """
+        up = self.__up_map.pop(uid)
+        self.__indexes.remove(up)
+        return up
+
+    def build(self) -> DataSourceSnapshot:
+        """
+        构建新快照
+
+        Returns:
+            新快照
+        """
+        return DataSourceSnapshot(self.__up_map, self.generation, self.__indexes.build())
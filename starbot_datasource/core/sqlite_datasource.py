@@ -0,0 +1,441 @@
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NoReturn, Optional, Set, Tuple
+
+from loguru import logger
+from starbot_executor import executor
+
+from .. import config
+from ..core.datasource import DataSource
+from ..core.loader import validate_ups
+from ..core.model import Up, LiveReport
+from ..exception.DataSourceException import DataSourceException
+
+MESSAGE_TABLES = ("live_on", "live_off", "dynamic_update")
+"""推送内容配置表，表结构相同"""
+
+FEATURE_TABLES = MESSAGE_TABLES + ("live_report",)
+"""推送功能配置表"""
+
+REPORT_COLUMNS = tuple(name for name in LiveReport.model_fields if name != "enabled")
+"""直播报告配置表中除 enabled 外的列"""
+
+_QUERY_CHUNK_SIZE = 500
+"""按 UID 查询时每批的 UID 数量，避免超出 SQLite 参数数量上限"""
+
+
+def _report_column_ddl(name: str) -> str:
+    """
+    生成直播报告配置表的列定义
+
+    Args:
+        name: 列名
+
+    Returns:
+        列定义
+    """
+    field = LiveReport.model_fields[name]
+    if field.annotation is bool:
+        return f"{name} INTEGER NOT NULL DEFAULT {int(field.default)}"
+    if field.annotation is int:
+        return f"{name} INTEGER NOT NULL DEFAULT {field.default}"
+    return f"{name} TEXT"
+
+
+def _changelog_triggers(table: str, uid_of: str) -> str:
+    """
+    生成在表发生变化时向变更日志写入主播 UID 的触发器
+
+    Args:
+        table: 表名
+        uid_of: 根据行记录获取主播 UID 的 SELECT 语句，使用 {row} 代指 NEW 或 OLD
+
+    Returns:
+        触发器定义
+    """
+    statements = []
+    for action, rows in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+        body = "".join(f"INSERT INTO changelog (uid) {uid_of.format(row=row)}; " for row in rows)
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_{action.lower()}_changelog AFTER {action} ON {table} "
+            f"BEGIN {body}END;"
+        )
+    return "\n".join(statements)
+
+
+SCHEMA = "\n".join([
+    "CREATE TABLE IF NOT EXISTS ups (uid INTEGER PRIMARY KEY);",
+    "CREATE TABLE IF NOT EXISTS platforms ("
+    "id INTEGER PRIMARY KEY, name TEXT NOT NULL, account NOT NULL, UNIQUE (name, account));",
+    "CREATE TABLE IF NOT EXISTS targets ("
+    "id INTEGER PRIMARY KEY, uid INTEGER NOT NULL REFERENCES ups (uid) ON DELETE CASCADE, "
+    "position INTEGER NOT NULL DEFAULT 0, target_id NOT NULL, "
+    "platform INTEGER NOT NULL REFERENCES platforms (id));",
+    "CREATE INDEX IF NOT EXISTS targets_uid ON targets (uid);",
+    "CREATE INDEX IF NOT EXISTS targets_platform ON targets (platform);",
+    *[
+        f"CREATE TABLE IF NOT EXISTS {table} ("
+        f"target INTEGER PRIMARY KEY REFERENCES targets (id) ON DELETE CASCADE, "
+        f"enabled INTEGER NOT NULL DEFAULT 0, message TEXT NOT NULL DEFAULT '');"
+        for table in MESSAGE_TABLES
+    ],
+    "CREATE TABLE IF NOT EXISTS live_report ("
+    "target INTEGER PRIMARY KEY REFERENCES targets (id) ON DELETE CASCADE, enabled INTEGER NOT NULL DEFAULT 0, "
+    + ", ".join(map(_report_column_ddl, REPORT_COLUMNS)) + ");",
+    "CREATE TABLE IF NOT EXISTS changelog (revision INTEGER PRIMARY KEY AUTOINCREMENT, uid INTEGER NOT NULL);",
+    _changelog_triggers("ups", "SELECT {row}.uid"),
+    _changelog_triggers("targets", "SELECT {row}.uid"),
+    *[
+        _changelog_triggers(table, "SELECT uid FROM targets WHERE id = {row}.target")
+        for table in FEATURE_TABLES
+    ]
+])
+"""数据库表结构，主播、推送目标及各项推送功能配置的任何变化都会通过触发器记录至变更日志"""
+
+_SELECT_TARGETS = (
+    "SELECT t.uid, t.target_id, p.name, p.account, "
+    + ", ".join(f"{table}.enabled, {table}.message" for table in MESSAGE_TABLES) + ", "
+    + "live_report.enabled, " + ", ".join(f"live_report.{column}" for column in REPORT_COLUMNS)
+    + " FROM targets t JOIN platforms p ON p.id = t.platform "
+    + " ".join(f"LEFT JOIN {table} ON {table}.target = t.id" for table in FEATURE_TABLES)
+)
+
+
+class SqliteStore:
+    """
+    SQLite 推送配置存储，所有方法均为阻塞调用，且须始终在同一线程中调用
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 数据库文件路径
+        """
+        self.__path = path
+        self.__connection: Optional[sqlite3.Connection] = None
+
+    def __connect(self) -> sqlite3.Connection:
+        """
+        获取数据库连接，首次调用时打开连接并创建表结构
+
+        Returns:
+            数据库连接
+        """
+        if self.__connection is None:
+            connection = sqlite3.connect(self.__path, isolation_level=None)
+            connection.execute("PRAGMA foreign_keys = ON")
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.executescript(SCHEMA)
+            self.__connection = connection
+        return self.__connection
+
+    def close(self) -> NoReturn:
+        """
+        关闭数据库连接
+        """
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def data_version(self) -> int:
+        """
+        获取数据库数据版本，其他连接提交修改后此值会发生变化
+
+        Returns:
+            数据版本
+        """
+        return self.__connect().execute("PRAGMA data_version").fetchone()[0]
+
+    def __fetch(self, uids: Optional[List[int]] = None) -> List[Up]:
+        """
+        读取主播配置
+
+        Args:
+            uids: 要读取的主播 UID，为 None 时读取全部主播。默认：None
+
+        Returns:
+            主播实例列表，不存在的主播会被忽略
+        """
+        connection = self.__connect()
+        order = " ORDER BY t.uid, t.position, t.id"
+        if uids is None:
+            up_rows = connection.execute("SELECT uid FROM ups ORDER BY uid").fetchall()
+            target_rows = connection.execute(_SELECT_TARGETS + order).fetchall()
+        else:
+            up_rows, target_rows = [], []
+            for start in range(0, len(uids), _QUERY_CHUNK_SIZE):
+                chunk = uids[start:start + _QUERY_CHUNK_SIZE]
+                marks = ", ".join("?" * len(chunk))
+                up_rows += connection.execute(f"SELECT uid FROM ups WHERE uid IN ({marks})", chunk).fetchall()
+                target_rows += connection.execute(
+                    _SELECT_TARGETS + f" WHERE t.uid IN ({marks})" + order, chunk
+                ).fetchall()
+
+        conf: Dict[int, Dict[str, Any]] = {uid: {"uid": uid, "targets": []} for uid, in up_rows}
+        for row in target_rows:
+            up = conf.get(row[0])
+            if up is None:
+                continue
+
+            target = {"id": row[1], "platform": {"name": row[2], "account": row[3]}}
+            column = 4
+            for table in MESSAGE_TABLES:
+                if row[column] is not None:
+                    target[table] = {"enabled": row[column], "message": row[column + 1]}
+                column += 2
+            if row[column] is not None:
+                target["live_report"] = {"enabled": row[column], **dict(zip(REPORT_COLUMNS, row[column + 1:]))}
+            up["targets"].append(target)
+
+        return validate_ups(list(conf.values()))
+
+    def load_all(self) -> Tuple[int, List[Up]]:
+        """
+        在同一个读事务中读取全部主播配置与当前变更日志版本
+
+        Returns:
+            (变更日志版本, 主播实例列表)
+        """
+        connection = self.__connect()
+        connection.execute("BEGIN")
+        try:
+            revision = connection.execute("SELECT COALESCE(MAX(revision), 0) FROM changelog").fetchone()[0]
+            return revision, self.__fetch()
+        finally:
+            connection.execute("COMMIT")
+
+    def load_changes(self, since: int, retention: int) -> Tuple[int, Optional[Set[int]], List[Up]]:
+        """
+        读取指定变更日志版本之后发生变化的主播配置，并清理超出保留数量的变更日志
+
+        Args:
+            since: 上次读取到的变更日志版本
+            retention: 变更日志保留条数
+
+        Returns:
+            (变更日志版本, 发生变化的主播 UID, 发生变化的主播实例列表)，
+            所需的变更日志已被清理时，发生变化的主播 UID 为 None，主播实例列表为全部主播
+        """
+        connection = self.__connect()
+        connection.execute("BEGIN")
+        try:
+            low, high = connection.execute("SELECT MIN(revision), MAX(revision) FROM changelog").fetchone()
+            if high is None or high <= since:
+                return since, set(), []
+
+            if low > since + 1:
+                return high, None, self.__fetch()
+
+            uids = [uid for uid, in connection.execute(
+                "SELECT DISTINCT uid FROM changelog WHERE revision > ? AND revision <= ?", (since, high)
+            )]
+            ups = self.__fetch(uids)
+        finally:
+            connection.execute("COMMIT")
+
+        try:
+            connection.execute("DELETE FROM changelog WHERE revision <= ?", (high - retention,))
+        except sqlite3.Error as ex:
+            logger.warning(f"清理 SQLite 数据源变更日志失败 {ex}")
+
+        return high, set(uids), ups
+
+    def save(self, ups: Iterable[Up]) -> NoReturn:
+        """
+        在一个事务中写入主播配置，已存在的主播会被整体替换
+
+        Args:
+            ups: 主播实例
+        """
+        connection = self.__connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for up in ups:
+                connection.execute("DELETE FROM ups WHERE uid = ?", (up.uid,))
+                connection.execute("INSERT INTO ups (uid) VALUES (?)", (up.uid,))
+                for position, target in enumerate(up.targets):
+                    platform = target.platform
+                    connection.execute(
+                        "INSERT OR IGNORE INTO platforms (name, account) VALUES (?, ?)",
+                        (platform.name, platform.account)
+                    )
+                    platform_id = connection.execute(
+                        "SELECT id FROM platforms WHERE name = ? AND account = ?", (platform.name, platform.account)
+                    ).fetchone()[0]
+                    target_id = connection.execute(
+                        "INSERT INTO targets (uid, position, target_id, platform) VALUES (?, ?, ?, ?)",
+                        (up.uid, position, target.id, platform_id)
+                    ).lastrowid
+
+                    for table in MESSAGE_TABLES:
+                        conf = getattr(target, table)
+                        connection.execute(
+                            f"INSERT INTO {table} (target, enabled, message) VALUES (?, ?, ?)",
+                            (target_id, conf.enabled, conf.message)
+                        )
+                    report = target.live_report
+                    connection.execute(
+                        f"INSERT INTO live_report (target, enabled, {', '.join(REPORT_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * (len(REPORT_COLUMNS) + 2))})",
+                        (target_id, report.enabled, *(getattr(report, column) for column in REPORT_COLUMNS))
+                    )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def delete(self, uids: Iterable[int]) -> NoReturn:
+        """
+        在一个事务中删除主播配置
+
+        Args:
+            uids: 主播 UID
+        """
+        connection = self.__connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany("DELETE FROM ups WHERE uid = ?", ((uid,) for uid in uids))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+
+class SqliteDataSource(DataSource):
+    """
+    使用 SQLite 数据库初始化的推送配置数据源
+    主播、推送目标与各项推送功能配置分表存储，数据库中的任何修改都会由触发器记录至变更日志
+    自动重载时仅读取上次重载后发生变化的主播
+    """
+    def __init__(self):
+        super().__init__()
+        self.__revision = 0
+        self.__data_version: Optional[int] = None
+        self.__task: Optional[asyncio.Task] = None
+        self.__worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SqliteDataSource")
+
+        self.__db_file = config.get("datasource.sqlite_datasource.file_path", str, "推送配置.db")
+        self.__auto_reload = config.get("datasource.sqlite_datasource.auto_reload", bool, True)
+        self.__auto_reload_interval = config.get("datasource.sqlite_datasource.auto_reload_interval", int, 5)
+        self.__changelog_retention = config.get("datasource.sqlite_datasource.changelog_retention", int, 100000)
+
+        self.__store = SqliteStore(self.__db_file)
+
+    async def __run(self, func, *args) -> Any:
+        """
+        在数据库专用线程中执行阻塞调用
+
+        Args:
+            func: 要执行的函数
+            args: 函数参数
+
+        Returns:
+            函数返回值
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.__worker, func, *args)
+
+    async def load(self) -> NoReturn:
+        """
+        从 SQLite 数据库中初始化配置
+        """
+        if self.loaded_ups:
+            return
+
+        logger.info("已选用 SQLite 作为 Bot 数据源")
+        logger.info("开始从 SQLite 中初始化 Bot 配置")
+
+        try:
+            self.__data_version = await self.__run(self.__store.data_version)
+            self.__revision, ups = await self.__run(self.__store.load_all)
+        except DataSourceException:
+            raise
+        except Exception as ex:
+            raise DataSourceException(f"读取 SQLite 数据库异常 {ex}")
+
+        self.add_many(ups)
+
+        logger.success(f"成功从 SQLite 中导入了 {len(self.ups)} 个 UP 主")
+
+        if self.__auto_reload:
+            self.__task = executor.create_task(self.__auto_reload_task())
+
+    async def save(self, ups: Iterable[Up]) -> NoReturn:
+        """
+        将主播配置写入数据库并立即应用至数据源，已存在的主播会被整体替换
+
+        Args:
+            ups: 主播实例
+        """
+        await self.__run(self.__store.save, list(ups))
+        await self.__reload()
+
+    async def delete(self, uids: Iterable[int]) -> NoReturn:
+        """
+        从数据库中删除主播配置并立即应用至数据源
+
+        Args:
+            uids: 主播 UID
+        """
+        await self.__run(self.__store.delete, list(uids))
+        await self.__reload()
+
+    async def close(self) -> NoReturn:
+        """
+        停止自动重载，关闭数据库连接并释放数据库专用线程
+        """
+        await super().close()
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+        await self.__run(self.__store.close)
+        self.__worker.shutdown(wait=False)
+
+    async def __auto_reload_task(self) -> NoReturn:
+        """
+        数据库内容发生变化时自动重载配置
+        """
+        while True:
+            await asyncio.sleep(self.__auto_reload_interval)
+            try:
+                data_version = await self.__run(self.__store.data_version)
+            except Exception as ex:
+                logger.error(f"读取 SQLite 数据库数据版本异常 {ex}")
+                continue
+
+            if data_version == self.__data_version:
+                continue
+
+            self.__data_version = data_version
+            await self.__reload()
+
+    async def __reload(self) -> NoReturn:
+        """
+        读取上次重载后发生变化的主播并应用配置变化
+        """
+        start = time.perf_counter()
+        try:
+            revision, scope, ups = await self.__run(
+                self.__store.load_changes, self.__revision, self.__changelog_retention
+            )
+            if revision == self.__revision:
+                self.metrics.reload_finished(self.name, "skipped", time.perf_counter() - start)
+                return
+
+            self.metrics.stage(self.name, "read", time.perf_counter() - start)
+            logger.info(f"数据源配置已更新, 开始重载配置")
+            if scope is None:
+                logger.warning("SQLite 数据源变更日志已被清理, 开始完整重载配置")
+
+            self.reconcile(ups, scope)
+
+            self.__revision = revision
+            self.metrics.reload_finished(self.name, "applied", time.perf_counter() - start)
+            logger.success("数据源配置重载成功")
+        except Exception as ex:
+            self.metrics.reload_failed(self.name, ex, time.perf_counter() - start)
+            if isinstance(ex, DataSourceException):
+                logger.error(ex.msg)
+            else:
+                logger.error(f"数据源自动重载任务异常 {ex}")
@@ -0,0 +1,216 @@
+import re
+import threading
+from enum import Enum
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple, Union
+from weakref import WeakValueDictionary
+
+LIVE_ON_FIELDS = frozenset({"uname", "title", "url", "cover"})
+"""开播推送专用占位符"""
+
+LIVE_OFF_FIELDS = frozenset({"uname"})
+"""下播推送专用占位符"""
+
+DYNAMIC_UPDATE_FIELDS = frozenset({"uname", "action", "url", "picture"})
+"""动态推送专用占位符"""
+
+SPLIT = "next"
+"""消息分条占位符"""
+
+DIRECTIVES = frozenset({"atall"})
+"""无参数的通用占位符"""
+
+PARAMETERIZED_DIRECTIVES = frozenset({"at", "urlpic", "pathpic", "base64pic"})
+"""带参数的通用占位符"""
+
+_PLACEHOLDER = re.compile(r"\{(\w+)(?:=([^{}]*))?}", re.ASCII)
+
+
+class TemplateSyntaxError(ValueError):
+    """
+    推送内容模板语法错误
+    """
+    pass
+
+
+class TokenType(Enum):
+    """
+    模板片段类型枚举
+    """
+    Literal = "Literal"
+    """普通文本"""
+
+    Field = "Field"
+    """专用占位符，如 {uname}"""
+
+    Directive = "Directive"
+    """通用占位符，如 {atall}，{at=114514}，{urlpic=链接}"""
+
+    Split = "Split"
+    """消息分条，即 {next}"""
+
+
+class Token(NamedTuple):
+    """
+    模板片段
+    """
+
+    type: TokenType
+    """片段类型"""
+
+    value: str
+    """普通文本内容，或占位符名称"""
+
+    argument: Optional[str] = None
+    """带参数通用占位符的参数，其余类型为 None"""
+
+
+class MessageTemplate:
+    """
+    预编译的推送内容模板，创建后不可修改
+    内容相同的模板会共享同一个实例，请通过 compile_template() 获取
+    """
+
+    __slots__ = ("__source", "__allowed_fields", "__tokens", "__segments", "__fields", "__weakref__")
+
+    def __init__(self, source: str, allowed_fields: FrozenSet[str], tokens: Tuple[Token, ...]):
+        self.__source = source
+        self.__allowed_fields = allowed_fields
+        self.__tokens = tokens
+        self.__fields = frozenset(token.value for token in tokens if token.type == TokenType.Field)
+
+        segments: List[Tuple[Token, ...]] = []
+        segment: List[Token] = []
+        for token in tokens:
+            if token.type == TokenType.Split:
+                segments.append(tuple(segment))
+                segment = []
+            else:
+                segment.append(token)
+        segments.append(tuple(segment))
+        self.__segments = tuple(segments)
+
+    @property
+    def source(self) -> str:
+        """
+        模板原文
+        """
+        return self.__source
+
+    @property
+    def tokens(self) -> Tuple[Token, ...]:
+        """
+        模板片段
+        """
+        return self.__tokens
+
+    @property
+    def segments(self) -> Tuple[Tuple[Token, ...], ...]:
+        """
+        按 {next} 分条后的模板片段，每一项对应一条消息
+        """
+        return self.__segments
+
+    @property
+    def fields(self) -> FrozenSet[str]:
+        """
+        模板中使用的专用占位符名称
+        """
+        return self.__fields
+
+    def render(self, values: Dict[str, str]) -> List[List[Union[str, Token]]]:
+        """
+        使用给定的值替换专用占位符，相邻的文本会被合并，通用占位符原样保留以便推送平台处理
+
+        Args:
+            values: 专用占位符名称与替换值的字典，缺少的占位符替换为空字符串
+
+        Returns:
+            分条后的消息列表，每条消息由文本与通用占位符片段组成
+        """
+        messages = []
+        for segment in self.__segments:
+            parts: List[Union[str, Token]] = []
+            for token in segment:
+                if token.type == TokenType.Directive:
+                    parts.append(token)
+                    continue
+
+                text = token.value if token.type == TokenType.Literal else values.get(token.value, "")
+                if parts and isinstance(parts[-1], str):
+                    parts[-1] += text
+                else:
+                    parts.append(text)
+            messages.append(parts)
+        return messages
+
+    def __reduce__(self):
+        return compile_template, (self.__source, self.__allowed_fields)
+
+    def __repr__(self):
+        return f"MessageTemplate({self.__source!r})"
+
+
+_cache: "WeakValueDictionary[Tuple[FrozenSet[str], str], MessageTemplate]" = WeakValueDictionary()
+_cache_lock = threading.Lock()
+
+
+def _tokenize(source: str, fields: FrozenSet[str]) -> Tuple[Token, ...]:
+    """
+    将模板原文解析为模板片段
+
+    Args:
+        source: 模板原文
+        fields: 允许使用的专用占位符名称
+
+    Returns:
+        模板片段
+    """
+    tokens = []
+    position = 0
+    for match in _PLACEHOLDER.finditer(source):
+        if match.start() > position:
+            tokens.append(Token(TokenType.Literal, source[position:match.start()]))
+        position = match.end()
+
+        name, argument = match.group(1), match.group(2)
+        if argument is not None:
+            if name not in PARAMETERIZED_DIRECTIVES:
+                raise TemplateSyntaxError(f"推送内容模板中的占位符 {match.group(0)} 不支持参数")
+            if not argument:
+                raise TemplateSyntaxError(f"推送内容模板中的占位符 {match.group(0)} 缺少参数")
+            tokens.append(Token(TokenType.Directive, name, argument))
+        elif name == SPLIT:
+            tokens.append(Token(TokenType.Split, name))
+        elif name in DIRECTIVES:
+            tokens.append(Token(TokenType.Directive, name))
+        elif name in fields:
+            tokens.append(Token(TokenType.Field, name))
+        elif name in PARAMETERIZED_DIRECTIVES:
+            raise TemplateSyntaxError(f"推送内容模板中的占位符 {match.group(0)} 缺少参数")
+        else:
+            raise TemplateSyntaxError(f"推送内容模板中存在不支持的占位符 {match.group(0)}")
+
+    if position < len(source):
+        tokens.append(Token(TokenType.Literal, source[position:]))
+    return tuple(tokens)
+
+
+def compile_template(source: str, fields: FrozenSet[str]) -> MessageTemplate:
+    """
+    编译推送内容模板，内容与可用占位符均相同的模板在使用期间共享同一个实例
+
+    Args:
+        source: 模板原文
+        fields: 允许使用的专用占位符名称
+
+    Returns:
+        预编译的推送内容模板
+    """
+    key = (fields, source)
+    template = _cache.get(key)
+    if template is not None:
+        return template
+
+    template = MessageTemplate(source, fields, _tokenize(source, fields))
+    with _cache_lock:
+        return _cache.setdefault(key, template)
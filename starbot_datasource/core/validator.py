@@ -0,0 +1,73 @@
+from collections import Counter
+from typing import Iterable, List, Union, Tuple
+
+from ..core.model import Up, Platform
+from ..core.template import TemplateSyntaxError
+
+MESSAGE_CONFIGS = ("live_on", "live_off", "dynamic_update")
+"""含推送内容模板的推送配置"""
+
+
+def _describe_target(target_id: Union[int, str], platform: Platform) -> str:
+    return f"推送目标 (ID: {target_id}, 平台: {platform.name}, 账号: {platform.account})"
+
+
+def check_duplicates(ups: Iterable[Up]) -> List[str]:
+    """
+    检查主播配置中是否含有重复的主播
+
+    Args:
+        ups: 主播实例
+
+    Returns:
+        问题列表，无问题时为空列表
+    """
+    counts = Counter(up.uid for up in ups)
+    return [f"主播 (UID: {uid}) 重复出现了 {count} 次" for uid, count in counts.items() if count > 1]
+
+
+def check_up(up: Up) -> List[str]:
+    """
+    检查单个主播的推送目标之间的约束，以及各推送内容模板能否编译
+    使用 model_construct() 构建或校验后直接修改的实例未经过模型校验，此处会重新编译其推送内容模板
+
+    Args:
+        up: 主播实例
+
+    Returns:
+        问题列表，无问题时为空列表
+    """
+    problems = []
+    seen = set()
+    reported = set()
+    for target in up.targets:
+        key: Tuple[Union[int, str], Platform] = (target.id, target.platform)
+        if key in seen:
+            if key not in reported:
+                reported.add(key)
+                problems.append(f"主播 (UID: {up.uid}) 的{_describe_target(*key)} 重复配置")
+        else:
+            seen.add(key)
+
+        for name in MESSAGE_CONFIGS:
+            try:
+                getattr(target, name).template
+            except TemplateSyntaxError as ex:
+                problems.append(f"主播 (UID: {up.uid}) 的{_describe_target(*key)} {name}.message 参数不合法 ({ex})")
+
+    return problems
+
+
+def format_problems(problems: List[str]) -> str:
+    """
+    将问题列表整理为校验报告
+
+    Args:
+        problems: 问题列表
+
+    Returns:
+        校验报告
+    """
+    lines = [f"数据源配置校验未通过, 共 {len(problems)} 个问题, 已保留当前配置:"]
+    lines.extend(problems)
+    return "\n".join(lines)
@@ -0,0 +1,273 @@
+import abc
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from typing import Dict, NoReturn, Optional, Tuple
+
+from loguru import logger
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class FileWatcher(metaclass=abc.ABCMeta):
+    """
+    文件变化监视器基类
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @abc.abstractmethod
+    async def wait(self) -> NoReturn:
+        """
+        等待至文件发生变化
+        """
+        pass
+
+    def close(self) -> NoReturn:
+        """
+        释放监视器占用的资源，基类空实现
+        """
+        pass
+
+
+class PollingFileWatcher(FileWatcher):
+    """
+    通过定时检查修改时间实现的文件变化监视器
+    """
+
+    def __init__(self, path: str, interval: float, modify_time: Optional[float] = None):
+        super().__init__(path)
+        self.__interval = interval
+        self.__modify_time = modify_time
+
+    async def wait(self) -> NoReturn:
+        """
+        每隔指定时间检查一次文件修改时间，直至文件修改时间发生变化或无法获取文件修改时间
+        """
+        while True:
+            await asyncio.sleep(self.__interval)
+            try:
+                modify_time = os.path.getmtime(self.path)
+            except OSError:
+                return
+
+            if modify_time != self.__modify_time:
+                self.__modify_time = modify_time
+                return
+
+
+class IntervalWatcher(FileWatcher):
+    """
+    每隔指定时间无条件报告一次变化的监视器，用于由调用方自行比较变化的场景，如监视目录中的全部文件
+    """
+
+    def __init__(self, path: str, interval: float):
+        super().__init__(path)
+        self.__interval = interval
+
+    async def wait(self) -> NoReturn:
+        """
+        等待指定时间
+        """
+        await asyncio.sleep(self.__interval)
+
+
+class InotifyFileWatcher(FileWatcher):
+    """
+    基于 Linux inotify 实现的文件变化监视器
+    监视文件所在目录而非文件本身，以便正确处理编辑器先写入临时文件再重命名覆盖的保存方式
+    文件路径为符号链接时，同时监视链接所在目录中的全部变化与链接目标所在目录，并在每次变化后重新解析链接目标，
+    以便正确处理指向其他目录的链接，以及 Kubernetes ConfigMap 通过替换 ..data 链接更新配置的方式
+    """
+
+    def __init__(self, path: str, directory: bool = False):
+        """
+        Args:
+            path: 要监视的文件路径，或要监视的目录路径
+            directory: 是否监视目录中的全部文件。默认：False
+        """
+        super().__init__(path)
+        self.__changed = asyncio.Event()
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__names: Dict[int, Optional[bytes]] = {}
+        self.__target: Optional[Tuple[int, str]] = None
+
+        self.__libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.__fd = self.__libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.__fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 调用失败")
+
+        path = os.path.abspath(path)
+        self.__symlink = not directory and os.path.islink(path)
+        try:
+            if directory:
+                self.__link_wd = self.__add_watch(path, None)
+            else:
+                name = None if self.__symlink else os.fsencode(os.path.basename(path))
+                self.__link_wd = self.__add_watch(os.path.dirname(path), name)
+                if self.__symlink:
+                    self.__watch_target()
+        except OSError:
+            os.close(self.__fd)
+            raise
+
+    def __add_watch(self, directory: str, name: Optional[bytes]) -> int:
+        """
+        监视目录中的变化
+
+        Args:
+            directory: 目录路径
+            name: 仅关注此文件名的变化，为 None 时关注目录中的全部变化
+
+        Returns:
+            inotify 监视描述符
+        """
+        mask = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+        wd = self.__libc.inotify_add_watch(self.__fd, os.fsencode(directory), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch 调用失败: {directory}")
+
+        if wd in self.__names and self.__names[wd] != name:
+            name = None
+        self.__names[wd] = name
+        return wd
+
+    def __watch_target(self) -> NoReturn:
+        """
+        解析符号链接的最终目标，目标发生变化时改为监视新目标所在的目录
+        """
+        real = os.path.realpath(self.path)
+        if self.__target is not None:
+            wd, current = self.__target
+            if current == real:
+                return
+            if wd != self.__link_wd:
+                self.__names.pop(wd, None)
+                self.__libc.inotify_rm_watch(self.__fd, wd)
+            self.__target = None
+
+        try:
+            wd = self.__add_watch(os.path.dirname(real), os.fsencode(os.path.basename(real)))
+        except OSError as ex:
+            logger.warning(f"无法监视符号链接 {self.path} 的目标 {real} {ex}, 将在链接所在目录发生变化时重试")
+            return
+        self.__target = (wd, real)
+
+    @staticmethod
+    def available() -> bool:
+        """
+        当前平台是否支持 inotify
+
+        Returns:
+            是否支持 inotify
+        """
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            return hasattr(libc, "inotify_init1")
+        except OSError:
+            return False
+
+    def __on_readable(self) -> NoReturn:
+        """
+        inotify 文件描述符可读时的回调，解析事件并在目标文件发生变化时唤醒等待者
+        """
+        try:
+            buffer = os.read(self.__fd, 65536)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF):
+                self.__changed.set()
+            elif wd in self.__names:
+                expected = self.__names[wd]
+                if expected is None or name == expected:
+                    self.__changed.set()
+
+        if self.__symlink and self.__changed.is_set():
+            self.__watch_target()
+
+    async def wait(self) -> NoReturn:
+        """
+        等待至 inotify 报告目标文件发生变化
+        """
+        if self.__loop is None:
+            self.__loop = asyncio.get_running_loop()
+            self.__loop.add_reader(self.__fd, self.__on_readable)
+
+        await self.__changed.wait()
+        self.__changed.clear()
+
+    def close(self) -> NoReturn:
+        """
+        移除事件循环中的监听并关闭 inotify 文件描述符
+        """
+        if self.__fd < 0:
+            return
+        if self.__loop is not None:
+            self.__loop.remove_reader(self.__fd)
+        os.close(self.__fd)
+        self.__fd = -1
+
+
+def create_watcher(path: str,
+                   backend: str,
+                   interval: float,
+                   modify_time: Optional[float] = None,
+                   directory: bool = False) -> FileWatcher:
+    """
+    根据配置创建文件变化监视器
+
+    Args:
+        path: 要监视的文件路径，或要监视的目录路径
+        backend: 监视方式，可选值：auto（优先使用 inotify），inotify，polling（定时比较修改时间），
+                 interval（每隔检查间隔无条件重载一次，由重载时的内容摘要比较跳过未变化的内容）
+        interval: 使用定时检查方式时的检查间隔
+        modify_time: 文件当前的修改时间，使用定时检查方式时作为比较基准。默认：None
+        directory: 是否监视目录中的全部文件，使用定时检查方式时每隔检查间隔报告一次变化。默认：False
+
+    Returns:
+        文件变化监视器
+    """
+    if backend not in ("auto", "inotify", "polling", "interval"):
+        logger.warning(f"不支持的文件监视方式: {backend}, 已使用默认值: auto")
+        backend = "auto"
+
+    if backend == "interval":
+        return IntervalWatcher(path, interval)
+
+    if backend != "polling":
+        if InotifyFileWatcher.available():
+            try:
+                return InotifyFileWatcher(path, directory)
+            except OSError as ex:
+                logger.warning(f"inotify 文件监视器初始化失败 {ex}, 将使用定时检查方式监视文件变化")
+        elif backend == "inotify":
+            logger.warning("当前平台不支持 inotify, 将使用定时检查方式监视文件变化")
+
+    if directory:
+        return IntervalWatcher(path, interval)
+    return PollingFileWatcher(path, interval, modify_time)
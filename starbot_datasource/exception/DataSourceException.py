@@ -7,5 +7,5 @@ class DataSourceException(ApiException):
     """
 
     def __init__(self, msg: str):
-        super().__init__()
+        super().__init__(msg)
         self.msg = msg
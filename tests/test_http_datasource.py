@@ -0,0 +1,276 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from starbot_executor import executor
+
+from starbot_datasource import HttpDataSource, NullMetrics, config
+from starbot_datasource.core import http_datasource
+from starbot_datasource.core.http_datasource import HttpFetcher, get_reload_delay
+from starbot_datasource.exception.DataSourceException import DataSourceException
+
+
+def make_body(count, message="{uname} 开播啦"):
+    ups = [
+        {
+            "uid": uid,
+            "targets": [
+                {
+                    "id": 1000 + uid,
+                    "platform": {"name": "QQ/StarBot", "account": 1},
+                    "live_on": {"enabled": True, "message": message},
+                }
+            ],
+        }
+        for uid in range(1, count + 1)
+    ]
+    return json.dumps(ups, ensure_ascii=False).encode()
+
+
+class Server:
+    """
+    测试用推送配置服务端，记录每次请求的客户端端口与请求头
+    """
+
+    def __init__(self):
+        self.body = make_body(3)
+        self.failures = 0
+        self.close_connection = False
+        self.requests = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append({
+                    "port": self.client_address[1],
+                    "if_none_match": self.headers.get("If-None-Match"),
+                    "accept_encoding": self.headers.get("Accept-Encoding", ""),
+                })
+
+                if server.failures:
+                    server.failures -= 1
+                    self.send_response(500)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                etag = f'"{hashlib.md5(server.body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                data = server.body
+                gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+                if gzipped:
+                    data = gzip.compress(data)
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                if gzipped:
+                    self.send_header("Content-Encoding", "gzip")
+                if server.close_connection:
+                    self.send_header("Connection", "close")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/push.json"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = Server()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def fetcher(server):
+    fetcher = HttpFetcher(server.url, 5)
+    yield fetcher
+    fetcher.close()
+
+
+class RecordingMetrics(NullMetrics):
+    """
+    记录每次重载结果的指标钩子
+    """
+
+    def __init__(self):
+        self.results = []
+
+    def reload_finished(self, source, result, seconds):
+        self.results.append(result)
+
+    def reload_failed(self, source, exception, seconds):
+        self.results.append("failed")
+
+
+def make_datasource(server, **options):
+    config.load({
+        "datasource": {
+            "http_datasource": {
+                "url": server.url,
+                "headers": {},
+                "timeout": 5,
+                "auto_reload": False,
+                "auto_reload_interval": 5,
+                "max_backoff": 30,
+                **options,
+            }
+        }
+    })
+    datasource = HttpDataSource()
+    metrics = RecordingMetrics()
+    datasource.set_metrics(metrics)
+    return datasource, metrics
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = executor.init()
+    yield loop
+    loop.close()
+
+
+def test_etag_304_skips_parsing(server, fetcher):
+    digest, ups, validators = fetcher.load()
+    assert [up.uid for up in ups] == [1, 2, 3]
+    assert server.requests[0]["if_none_match"] is None
+
+    fetcher.commit(validators)
+    assert fetcher.load(digest) == (None, None, None)
+    assert server.requests[1]["if_none_match"] == validators.etag
+
+
+def test_uncommitted_validators_are_not_sent(server, fetcher):
+    fetcher.load()
+    fetcher.load()
+    assert [request["if_none_match"] for request in server.requests] == [None, None]
+
+
+def test_changed_content_is_fetched_again(server, fetcher):
+    digest, _, validators = fetcher.load()
+    fetcher.commit(validators)
+
+    server.body = make_body(4)
+    new_digest, ups, _ = fetcher.load(digest)
+    assert new_digest != digest
+    assert len(ups) == 4
+
+
+def test_gzip_response_is_decoded(server, fetcher):
+    assert fetcher.fetch()[0] == server.body
+    assert "gzip" in server.requests[0]["accept_encoding"]
+
+
+def test_connection_is_reused(server, fetcher):
+    for _ in range(3):
+        fetcher.fetch()
+
+    assert len(server.requests) == 3
+    assert len({request["port"] for request in server.requests}) == 1
+
+
+def test_reconnects_after_server_closes_connection(server, fetcher):
+    server.close_connection = True
+    fetcher.fetch()
+    server.close_connection = False
+    fetcher.fetch()
+
+    assert len({request["port"] for request in server.requests}) == 2
+
+
+def test_error_status_raises(server, fetcher):
+    server.failures = 1
+    with pytest.raises(DataSourceException):
+        fetcher.fetch()
+
+
+def test_reload_failure_and_recovery(server, loop):
+    datasource, metrics = make_datasource(server)
+
+    async def main():
+        await datasource.load()
+        assert len(datasource.ups) == 3
+
+        server.failures = 1
+        assert not await datasource.reload()
+
+        assert await datasource.reload()
+        assert datasource.skipped_reloads == 1
+
+        server.body = make_body(5)
+        assert await datasource.reload()
+        assert len(datasource.ups) == 5
+        await datasource.close()
+
+    loop.run_until_complete(main())
+    assert metrics.results == ["failed", "skipped", "applied"]
+
+
+def test_invalid_body_keeps_failing(server, loop):
+    datasource, metrics = make_datasource(server)
+
+    async def main():
+        await datasource.load()
+
+        server.body = make_body(3, message="{bogus}")
+        for _ in range(3):
+            assert not await datasource.reload()
+        await datasource.close()
+
+    loop.run_until_complete(main())
+    assert metrics.results == ["failed", "failed", "failed"]
+    etags = {request["if_none_match"] for request in server.requests[1:]}
+    assert etags == {f'"{hashlib.md5(make_body(3)).hexdigest()}"'}
+
+
+def test_auto_reload_backs_off_on_failure(server, loop, monkeypatch):
+    failures = []
+
+    def get_reload_delay(interval, max_backoff, count):
+        failures.append(count)
+        return 0.01
+
+    monkeypatch.setattr(http_datasource, "get_reload_delay", get_reload_delay)
+    datasource, metrics = make_datasource(server, auto_reload=True)
+
+    async def main():
+        await datasource.load()
+        server.failures = 2
+        while len(metrics.results) < 4:
+            await asyncio.sleep(0.01)
+        await datasource.close()
+
+    loop.run_until_complete(main())
+    assert metrics.results[:4] == ["failed", "failed", "skipped", "skipped"]
+    assert failures[:4] == [0, 1, 2, 0]
+
+
+@pytest.mark.parametrize("bound, expected", [
+    ("high", [5, 10, 20, 30, 30]),
+    ("low", [5, 5, 10, 15, 15]),
+])
+def test_reload_delay(monkeypatch, bound, expected):
+    monkeypatch.setattr(random, "uniform", lambda low, high: high if bound == "high" else low)
+    assert [get_reload_delay(5, 30, failures) for failures in range(5)] == expected